@@ -0,0 +1,48 @@
+#define CATCH_CONFIG_MAIN
+#define CATCH_CONFIG_ENABLE_BENCHMARKING
+#include <catch2/catch.hpp>
+
+#include "graph.hpp"
+using structures::Graph;
+
+
+TEMPLATE_TEST_CASE(
+	"linking a star graph with 1M leaves is linear on its size", "[Graph][benchmark]",
+	(Graph<int,double,false>), (Graph<int,double,true>)
+) {
+	// a hub node is the worst case for copies of adjacencies in edge lookups
+	const int leaves = 1000000;
+
+	BENCHMARK("link") {
+		TestType g(leaves + 1);
+		for (int i = 1; i <= leaves; ++i)
+			g.link(0, i, i);
+		return g.edge_number();
+	};
+
+	TestType g(leaves + 1);
+	for (int i = 1; i <= leaves; ++i)
+		g.link(0, i, i);
+	REQUIRE(g.edge_number() == leaves);
+
+	BENCHMARK("contains") {
+		int found = 0;
+		for (int i = 1; i <= leaves; ++i)
+			found += g.contains(0, i);
+		return found;
+	};
+
+	BENCHMARK("weight") {
+		double sum = 0;
+		for (int i = 1; i <= leaves; ++i)
+			sum += g.weight(0, i);
+		return sum;
+	};
+
+	BENCHMARK("degree_out") {
+		long sum = 0;
+		for (int i = 0; i <= leaves; ++i)
+			sum += g.degree_out(i);
+		return sum;
+	};
+}
@@ -0,0 +1,105 @@
+/*
+ * Copyright (c) 2019 Gabriel B. Sant'Anna <baiocchi.gabriel@gmail.com>
+ * @License Apache <https://gitlab.com/baioc/pygraphs>
+ */
+
+#ifndef STRUCTURES_DISJOINT_SET_HPP
+#define STRUCTURES_DISJOINT_SET_HPP
+
+#include <vector>
+#include <utility> // swap
+#include <cassert>
+
+
+namespace structures {
+
+// union-find forest over the elements 0 up to size()-1, kept in flat arrays
+// with union by rank and path halving
+class DisjointSet {
+ public:
+	DisjointSet() = default;
+	explicit DisjointSet(int);
+
+	int size() const;
+	int count() const;
+
+	int make();
+	int find(int);
+	bool unite(int, int);
+	bool same(int, int);
+
+ private:
+	std::vector<int> parent_;
+	std::vector<unsigned char> rank_; // bounded by lg(size)
+	int sets_{0};
+};
+
+
+// starts with as many singletons
+inline DisjointSet::DisjointSet(int elements) :
+	parent_(elements), rank_(elements, 0), sets_{elements}
+{
+	assert(elements >= 0);
+	for (int i = 0; i < elements; ++i)
+		parent_[i] = i;
+}
+
+inline int DisjointSet::size() const
+{
+	return parent_.size();
+}
+
+// number of disjoint sets
+inline int DisjointSet::count() const
+{
+	return sets_;
+}
+
+inline int DisjointSet::make()
+{
+	const int element = size();
+	parent_.push_back(element);
+	rank_.push_back(0);
+	++sets_;
+	return element; // the new singleton
+}
+
+inline int DisjointSet::find(int element)
+{
+	if (element < 0 || element >= size())
+		return -1;
+
+	while (parent_[element] != element) {
+		parent_[element] = parent_[parent_[element]];
+		element = parent_[element];
+	}
+
+	return element; // representative of its set
+}
+
+inline bool DisjointSet::unite(int a, int b)
+{
+	a = find(a);
+	b = find(b);
+	if (a < 0 || b < 0 || a == b)
+		return false;
+
+	if (rank_[a] < rank_[b])
+		std::swap(a, b);
+	parent_[b] = a;
+	if (rank_[a] == rank_[b])
+		++rank_[a];
+
+	--sets_;
+	return true; // whether two sets were merged
+}
+
+inline bool DisjointSet::same(int a, int b)
+{
+	const int root = find(a);
+	return root >= 0 && root == find(b);
+}
+
+} // namespace structures
+
+#endif // STRUCTURES_DISJOINT_SET_HPP
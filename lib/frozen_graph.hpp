@@ -0,0 +1,149 @@
+/*
+ * Copyright (c) 2019 Gabriel B. Sant'Anna <baiocchi.gabriel@gmail.com>
+ * @License Apache <https://gitlab.com/baioc/pygraphs>
+ */
+
+#ifndef STRUCTURES_FROZEN_GRAPH_HPP
+#define STRUCTURES_FROZEN_GRAPH_HPP
+
+#include "graph.hpp"
+
+#include <vector>
+#include <unordered_map>
+#include <utility> // pair
+#include <algorithm> // sort
+#include <cstdint> // int64_t
+
+
+namespace structures {
+
+template <typename Label, typename Weight>
+	// requires Hashable<Label>
+class FrozenGraph {
+ public:
+	template <bool direct>
+	explicit FrozenGraph(const Graph<Label,Weight,direct>&);
+
+	bool directed() const;
+
+	int node_number() const;
+	int edge_number() const;
+	int arc_number() const;
+
+	int id(const Label&) const;
+
+	// compressed sparse row layout: arcs leaving node i are stored, sorted by
+	// target id, in positions [offsets[i], offsets[i+1]) of targets & weights;
+	// undirected edges are stored once in each direction
+	const std::vector<Label>& labels() const;
+	const std::vector<std::int64_t>& offsets() const;
+	const std::vector<std::int64_t>& targets() const;
+	const std::vector<Weight>& weights() const;
+
+ private:
+	bool directed_;
+	int edges_;
+	std::unordered_map<Label,int> ids_;
+	std::vector<Label> labels_;
+	std::vector<std::int64_t> offsets_;
+	std::vector<std::int64_t> targets_;
+	std::vector<Weight> weights_;
+};
+
+
+template <typename L, typename W>
+template <bool dir>
+FrozenGraph<L,W>::FrozenGraph(const Graph<L,W,dir>& graph) :
+	directed_{dir},
+	edges_{graph.edge_number()}
+{
+	const int n = graph.node_number();
+	ids_.reserve(n);
+	labels_.reserve(n);
+	for (const auto& assoc: graph.nodes()) {
+		ids_.emplace(assoc.first, static_cast<int>(labels_.size()));
+		labels_.push_back(assoc.first);
+	}
+
+	const int arcs = dir ? edges_ : 2 * edges_;
+	offsets_.reserve(n + 1);
+	targets_.reserve(arcs);
+	weights_.reserve(arcs);
+
+	std::vector<std::pair<std::int64_t,W>> row;
+	offsets_.push_back(0);
+	for (const auto& node: labels_) {
+		row.clear();
+		for (const auto& adj: graph.neighbours(node))
+			row.emplace_back(ids_.find(adj.first)->second, adj.second);
+
+		std::sort(row.begin(), row.end(), [](const auto& a, const auto& b) {
+			return a.first < b.first;
+		});
+
+		for (const auto& arc: row) {
+			targets_.push_back(arc.first);
+			weights_.push_back(arc.second);
+		}
+		offsets_.push_back(targets_.size());
+	}
+}
+
+template <typename L, typename W>
+inline bool FrozenGraph<L,W>::directed() const
+{
+	return directed_;
+}
+
+template <typename L, typename W>
+inline int FrozenGraph<L,W>::node_number() const
+{
+	return labels_.size();
+}
+
+template <typename L, typename W>
+inline int FrozenGraph<L,W>::edge_number() const
+{
+	return edges_;
+}
+
+template <typename L, typename W>
+inline int FrozenGraph<L,W>::arc_number() const
+{
+	return targets_.size();
+}
+
+template <typename L, typename W>
+inline int FrozenGraph<L,W>::id(const L& node) const
+{
+	const auto pos = ids_.find(node);
+	return pos != ids_.end() ? pos->second : -1;
+}
+
+template <typename L, typename W>
+inline const std::vector<L>& FrozenGraph<L,W>::labels() const
+{
+	return labels_;
+}
+
+template <typename L, typename W>
+inline const std::vector<std::int64_t>& FrozenGraph<L,W>::offsets() const
+{
+	return offsets_;
+}
+
+template <typename L, typename W>
+inline const std::vector<std::int64_t>& FrozenGraph<L,W>::targets() const
+{
+	return targets_;
+}
+
+template <typename L, typename W>
+inline const std::vector<W>& FrozenGraph<L,W>::weights() const
+{
+	return weights_;
+}
+
+} // namespace structures
+
+#endif // STRUCTURES_FROZEN_GRAPH_HPP
@@ -7,6 +7,7 @@
 #define STRUCTURES_GRAPH_HPP
 
 #include <unordered_map>
+#include <vector>
 #include <utility> // move, pair
 #include <limits> // infinity
 #include <cassert>
@@ -24,9 +25,10 @@ template <typename Label, typename Weight, bool direct=false>
 class Graph {
  public:
 	Graph() = default;
-	explicit Graph(int);
+	explicit Graph(int, bool=false);
 
 	constexpr bool directed() const;
+	bool reverse_indexed() const;
 
 	int node_number() const;
 	int edge_number() const;
@@ -35,6 +37,8 @@ class Graph {
 	int erase(const Label&);
 
 	int link(const Label&, const Label&, Weight=1);
+	int link_many(const std::vector<Label>&, const std::vector<Label>&,
+	              const std::vector<Weight>& = {});
 	int unlink(const Label&, const Label&);
 
 	bool contains(const Label&) const;
@@ -49,18 +53,25 @@ class Graph {
 	// intention is that these methods return some iterable in constant time
 	const unordered_map<Label,unordered_map<Label,Weight>>& nodes() const;
 	const unordered_map<Label,Weight>& neighbours(const Label&) const;
+	const unordered_map<Label,Weight>& predecessors(const Label&) const;
 
  private:
 	unordered_map<Label,unordered_map<Label,Weight>> adjacencies_;
+	// reverse adjacencies, only kept by directed graphs when requested
+	unordered_map<Label,unordered_map<Label,Weight>> predecessors_;
+	bool indexed_{false};
 	int edges_{0};
 };
 
 
-template <typename L, typename W, bool d>
-Graph<L,W,d>::Graph(int node_capacity)
+template <typename L, typename W, bool dir>
+Graph<L,W,dir>::Graph(int node_capacity, bool reverse_index) :
+	indexed_{dir && reverse_index}
 {
 	assert(node_capacity > 0);
 	adjacencies_.reserve(node_capacity);
+	if (indexed_)
+		predecessors_.reserve(node_capacity);
 }
 
 template <typename L, typename W, bool dir>
@@ -69,6 +80,13 @@ constexpr bool Graph<L,W,dir>::directed() const
 	return dir;
 }
 
+// undirected graphs are symmetric, so their adjacency is its own reverse index
+template <typename L, typename W, bool dir>
+inline bool Graph<L,W,dir>::reverse_indexed() const
+{
+	return !dir || indexed_;
+}
+
 template <typename L, typename W, bool d>
 inline int Graph<L,W,d>::node_number() const
 {
@@ -84,6 +102,8 @@ inline int Graph<L,W,d>::edge_number() const
 template <typename L, typename W, bool d>
 inline bool Graph<L,W,d>::insert(L node)
 {
+	if (indexed_)
+		predecessors_.try_emplace(node);
 	unordered_map<L,W> empty = {};
 	const auto ret = adjacencies_.emplace(std::move(node), std::move(empty));
 	return ret.second; // map's signaling of whether emplace occurred
@@ -92,19 +112,32 @@ inline bool Graph<L,W,d>::insert(L node)
 template <typename L, typename W, bool dir>
 int Graph<L,W,dir>::erase(const L& node)
 {
-	if (!contains(node))
+	const auto pos = adjacencies_.find(node);
+	if (pos == adjacencies_.end())
 		return -1;
 
-	int erased = adjacencies_[node].size();
-	adjacencies_.erase(node);
+	int erased = pos->second.size();
+
+	if constexpr (!dir) {
+		// symmetric adjacency: only neighbours may point back to the node
+		for (const auto& adj: pos->second)
+			adjacencies_[adj.first].erase(node);
+
+	} else if (indexed_) {
+		const auto rev = predecessors_.find(node);
+		for (const auto& adj: rev->second)
+			erased += adjacencies_[adj.first].erase(node);
+		for (const auto& adj: pos->second)
+			predecessors_[adj.first].erase(node);
+		predecessors_.erase(rev);
 
-	for (auto& assoc: adjacencies_) {
-		if constexpr (dir)
+	} else {
+		for (auto& assoc: adjacencies_)
 			erased += assoc.second.erase(node);
-		else
-			assoc.second.erase(node);
 	}
 
+	adjacencies_.erase(pos);
+	edges_ -= erased;
 	return erased; // number of erased edges
 }
 
@@ -114,21 +147,64 @@ int Graph<L,W,dir>::link(const L& node_from, const L& node_to, W weight)
 	if (node_from == node_to)
 		return 0; // ignore reflexive edges
 
-	// inserts any unregistered nodes before linking
-	const int inserted = insert(node_from) + insert(node_to);
+	// inserts any unregistered nodes before linking, keeping references to
+	// their adjacencies (which, unlike iterators, survive rehashing)
+	const auto from = adjacencies_.try_emplace(node_from);
+	auto& adj_from = from.first->second;
+	const auto to = adjacencies_.try_emplace(node_to);
+	auto& adj_to = to.first->second;
+	const int inserted = from.second + to.second;
 
-	// either making a new link
-	if (!contains(node_from, node_to))
+	// either making a new link or just updating its weight
+	if (adj_from.insert_or_assign(node_to, weight).second)
 		++edges_;
-
-	// or just updating its weight
-	adjacencies_[node_from][node_to] = std::move(weight);
 	if constexpr (!dir)
-		adjacencies_[node_to][node_from] = std::move(weight);
+		adj_to.insert_or_assign(node_from, std::move(weight));
+	else if (indexed_) {
+		predecessors_.try_emplace(node_from);
+		predecessors_[node_to].insert_or_assign(node_from, std::move(weight));
+	}
 
 	return inserted; // number of implicitly created nodes
 }
 
+template <typename L, typename W, bool dir>
+int Graph<L,W,dir>::link_many(const std::vector<L>& sources,
+                              const std::vector<L>& targets,
+                              const std::vector<W>& weights)
+{
+	const auto n = sources.size();
+	if (targets.size() != n || (!weights.empty() && weights.size() != n))
+		return -1; // mismatched edge columns
+
+	// heuristic upper bound on new nodes, avoiding rehashes during the load
+	const int before = node_number();
+	adjacencies_.reserve(before + n);
+
+	for (std::size_t i = 0; i < n; ++i) {
+		const L& node_from = sources[i];
+		const L& node_to = targets[i];
+		if (node_from == node_to)
+			continue; // ignore reflexive edges
+
+		const W weight = weights.empty() ? W(1) : weights[i];
+
+		// map references are stable, so each endpoint is hashed only once
+		auto& adj_from = adjacencies_[node_from];
+		auto& adj_to = adjacencies_[node_to];
+		if (adj_from.insert_or_assign(node_to, weight).second)
+			++edges_;
+		if constexpr (!dir)
+			adj_to.insert_or_assign(node_from, weight);
+		else if (indexed_) {
+			predecessors_.try_emplace(node_from);
+			predecessors_[node_to].insert_or_assign(node_from, weight);
+		}
+	}
+
+	return node_number() - before; // number of implicitly created nodes
+}
+
 template <typename L, typename W, bool dir>
 int Graph<L,W,dir>::unlink(const L& node_from, const L& node_to)
 {
@@ -142,6 +218,8 @@ int Graph<L,W,dir>::unlink(const L& node_from, const L& node_to)
 
 		if constexpr (!dir)
 			disconnected += adjacencies_[node_to].erase(node_from);
+		else if (indexed_)
+			predecessors_[node_to].erase(node_from);
 	}
 
 	return disconnected; // number of removed links
@@ -165,7 +243,8 @@ inline int Graph<L,W,dir>::degree(const L& node) const
 template <typename L, typename W, bool d>
 inline int Graph<L,W,d>::degree_out(const L& node) const
 {
-	return contains(node) ? adjacencies_.at(node).size() : -1;
+	const auto pos = adjacencies_.find(node);
+	return pos != adjacencies_.end() ? pos->second.size() : -1;
 }
 
 template <typename L, typename W, bool dir>
@@ -174,6 +253,10 @@ int Graph<L,W,dir>::degree_in(const L& node) const
 	if constexpr (!dir) {
 		return degree_out(node);
 
+	} else if (indexed_) {
+		const auto pos = predecessors_.find(node);
+		return pos != predecessors_.end() ? pos->second.size() : -1;
+
 	} else {
 		if (!contains(node))
 			return -1;
@@ -189,11 +272,8 @@ int Graph<L,W,dir>::degree_in(const L& node) const
 template <typename L, typename W, bool d>
 inline bool Graph<L,W,d>::contains(const L& node_from, const L& node_to) const
 {
-	if (contains(node_from)) {
-		auto adj = adjacencies_.at(node_from);
-		return adj.find(node_to) != adj.end();
-	}
-	return false;
+	const auto pos = adjacencies_.find(node_from);
+	return pos != adjacencies_.end() && pos->second.count(node_to) > 0;
 }
 
 template <typename L, typename Weight, bool dir>
@@ -205,11 +285,12 @@ Weight Graph<L,Weight,dir>::weight(const L& node_from, const L& node_to) const
 		else // if constexpr (dir)
 			return std::numeric_limits<Weight>::infinity();
 
-	} else if (contains(node_from)) {
-		const auto& adj = adjacencies_.at(node_from);
-		const auto& pos = adj.find(node_to);
-		if (pos != adj.end())
-			return pos->second;
+	} else if (const auto pos = adjacencies_.find(node_from);
+	           pos != adjacencies_.end()) {
+		const auto& adj = pos->second;
+		const auto arc = adj.find(node_to);
+		if (arc != adj.end())
+			return arc->second;
 	}
 
 	if constexpr (!dir)
@@ -227,8 +308,23 @@ const unordered_map<L,unordered_map<L,W>>& Graph<L,W,d>::nodes() const
 template <typename L, typename W, bool d>
 const unordered_map<L,W>& Graph<L,W,d>::neighbours(const L& node) const
 {
-	unordered_map<L,W> empty{};
-	return contains(node) ? adjacencies_.at(node) : empty;
+	static const unordered_map<L,W> none{};
+	const auto pos = adjacencies_.find(node);
+	return pos != adjacencies_.end() ? pos->second : none;
+}
+
+// in-neighbours; these are only known by undirected or reverse indexed graphs
+template <typename L, typename W, bool dir>
+const unordered_map<L,W>& Graph<L,W,dir>::predecessors(const L& node) const
+{
+	static const unordered_map<L,W> none{};
+
+	if constexpr (!dir) {
+		return neighbours(node);
+	} else {
+		const auto pos = predecessors_.find(node);
+		return pos != predecessors_.end() ? pos->second : none;
+	}
 }
 
 } // namespace structures
@@ -1,29 +1,274 @@
 // SWIG interface definition
-%module libpygraphs
+%module(threads="1") libpygraphs
 %{
 	// preprocessor directives directly included into wrapper code
 	#include "graph.hpp"
 	#include "priority_queue.hpp"
+	#include "frozen_graph.hpp"
+	#include "search.hpp"
+	#include "disjoint_set.hpp"
+
+	#include <memory> // unique_ptr
+
+	// packs a graph's CSR snapshot as Python objects, with columns as bytes
+	// that can be viewed through the buffer protocol without further copies
+	template <typename G>
+	PyObject* csr_snapshot(const G& graph)
+	{
+		// the snapshot is built without the GIL, Python objects only after
+		std::unique_ptr<structures::FrozenGraph<std::string,double>> frozen;
+		Py_BEGIN_ALLOW_THREADS
+		frozen = std::make_unique<structures::FrozenGraph<std::string,double>>(graph);
+		Py_END_ALLOW_THREADS
+		const auto& csr = *frozen;
+
+		PyObject* labels = PyList_New(csr.node_number());
+		if (labels == NULL)
+			return NULL;
+		for (int i = 0; i < csr.node_number(); ++i) {
+			const std::string& label = csr.labels()[i];
+			PyObject* item = PyUnicode_FromStringAndSize(label.data(), label.size());
+			if (item == NULL) {
+				Py_DECREF(labels); // along with the labels already in it
+				return NULL;
+			}
+			PyList_SET_ITEM(labels, i, item);
+		}
+
+		const auto bytes = [](const auto& column) {
+			return PyBytes_FromStringAndSize(
+				reinterpret_cast<const char*>(column.data()),
+				column.size() * sizeof(column[0]));
+		};
+		PyObject* offsets = bytes(csr.offsets());
+		PyObject* targets = bytes(csr.targets());
+		PyObject* weights = bytes(csr.weights());
+		if (offsets == NULL || targets == NULL || weights == NULL) {
+			Py_DECREF(labels);
+			Py_XDECREF(offsets);
+			Py_XDECREF(targets);
+			Py_XDECREF(weights);
+			return NULL;
+		}
+
+		return Py_BuildValue("(NiNNNN)",
+		                     PyBool_FromLong(csr.directed()), csr.edge_number(),
+		                     labels, offsets, targets, weights);
+	}
+
+	// packs a search tree as (labels, distances, antecessors), reached nodes
+	// first in visiting order and then any unreachable ones, with bytes columns
+	// of distances and antecessor positions (-1 for roots and unreachables)
+	PyObject* tree_columns(const structures::SearchTree<std::string,double>& tree)
+	{
+		const auto n = tree.distance.size();
+		std::vector<const std::string*> labels;
+		labels.reserve(n);
+		std::unordered_map<std::string,std::int64_t> position;
+		position.reserve(n);
+		for (const auto& v: tree.order) {
+			position.emplace(v, labels.size());
+			labels.push_back(&v);
+		}
+		for (const auto& item: tree.distance) {
+			if (position.emplace(item.first, labels.size()).second)
+				labels.push_back(&item.first);
+		}
+
+		std::vector<double> distances(labels.size());
+		std::vector<std::int64_t> antecessors(labels.size(), -1);
+		for (std::size_t i = 0; i < labels.size(); ++i) {
+			distances[i] = tree.distance.at(*labels[i]);
+			const auto pred = tree.antecessor.find(*labels[i]);
+			if (pred != tree.antecessor.end())
+				antecessors[i] = position.at(pred->second);
+		}
+
+		PyObject* list = PyList_New(labels.size());
+		if (list == NULL)
+			return NULL;
+		for (std::size_t i = 0; i < labels.size(); ++i) {
+			PyObject* label = PyUnicode_FromStringAndSize(labels[i]->data(),
+			                                              labels[i]->size());
+			if (label == NULL) {
+				Py_DECREF(list);
+				return NULL;
+			}
+			PyList_SET_ITEM(list, i, label);
+		}
+
+		PyObject* dist = PyBytes_FromStringAndSize(
+			reinterpret_cast<const char*>(distances.data()),
+			distances.size() * sizeof(double));
+		PyObject* pred = PyBytes_FromStringAndSize(
+			reinterpret_cast<const char*>(antecessors.data()),
+			antecessors.size() * sizeof(std::int64_t));
+		if (dist == NULL || pred == NULL) {
+			Py_DECREF(list);
+			Py_XDECREF(dist);
+			Py_XDECREF(pred);
+			return NULL;
+		}
+
+		return Py_BuildValue("(NNN)", list, dist, pred);
+	}
+
+	// lists (label, weight) pairs in a single call, instead of going through
+	// the map's proxy and iterator wrappers for every item; on failure, the
+	// Python error is left set and NULL returned, which SWIG propagates
+	PyObject* items_list(const std::unordered_map<std::string,double>& map)
+	{
+		PyObject* list = PyList_New(map.size());
+		if (list == NULL)
+			return NULL;
+
+		Py_ssize_t i = 0;
+		for (const auto& item: map) {
+			PyObject* pair = PyTuple_New(2);
+			if (pair == NULL) {
+				Py_DECREF(list);
+				return NULL;
+			}
+			PyList_SET_ITEM(list, i++, pair);
+
+			PyObject* label = PyUnicode_FromStringAndSize(item.first.data(),
+			                                              item.first.size());
+			PyObject* weight = PyFloat_FromDouble(item.second);
+			if (label == NULL || weight == NULL) {
+				Py_XDECREF(label);
+				Py_XDECREF(weight);
+				Py_DECREF(list); // along with the pairs already in it
+				return NULL;
+			}
+			PyTuple_SET_ITEM(pair, 0, label);
+			PyTuple_SET_ITEM(pair, 1, weight);
+		}
+		return list;
+	}
+
+	template <typename Map>
+	PyObject* keys_list(const Map& map)
+	{
+		PyObject* list = PyList_New(map.size());
+		if (list == NULL)
+			return NULL;
+
+		Py_ssize_t i = 0;
+		for (const auto& item: map) {
+			PyObject* label = PyUnicode_FromStringAndSize(item.first.data(),
+			                                              item.first.size());
+			if (label == NULL) {
+				Py_DECREF(list);
+				return NULL;
+			}
+			PyList_SET_ITEM(list, i++, label);
+		}
+		return list;
+	}
 %}
 
+// the GIL is only released by long running native operations, which never
+// touch Python objects; callers must follow the README's thread safety notes
+%nothread;
+%thread structures::Graph::link_many;
+%thread structures::Graph::erase;
+%thread structures::breadth_first<std::string,double,false>;
+%thread structures::breadth_first<std::string,double,true>;
+%thread structures::shortest_paths<std::string,double,false>;
+%thread structures::shortest_paths<std::string,double,true>;
+
 // wrap standard headers
 %include "std_string.i"
 %include "std_unordered_map.i"
+%include "std_vector.i"
 
 // ignores
 //
 
+// extensions
+%feature("compactdefaultargs") structures::Graph::link_many; // no dispatch
+%feature("pythonprepend") structures::Graph::link_many %{
+# accept any iterables, not only sequences and buffers; arrays other than
+# float64 are converted, since SWIG only takes Python numbers and strings
+args = tuple(a.tolist() if getattr(a, 'dtype', 'float64') != 'float64'
+             else a if hasattr(a, '__len__') else list(a) for a in args)
+%}
+%feature("pythonappend") structures::Graph::link_many %{
+if val < 0:
+    raise ValueError("link_many columns must have the same length")
+%}
+
+%extend structures::Graph {
+	PyObject* _csr() const { return csr_snapshot(*$self); }
+
+	PyObject* nodes_list() const { return keys_list($self->nodes()); }
+	PyObject* neighbours_list(const std::string& node) const {
+		return items_list($self->neighbours(node));
+	}
+	PyObject* predecessors_list(const std::string& node) const {
+		return items_list($self->predecessors(node));
+	}
+
+	%pythoncode %{
+	def freeze(self):
+	    """Build an immutable compressed sparse row snapshot of this graph."""
+	    from .frozen import FrozenGraph
+	    return FrozenGraph.from_graph(self)
+
+	def save(self, path):
+	    """Write a binary snapshot of this graph, see pygraphs.load."""
+	    self.freeze().save(path)
+
+	def to_shared_memory(self, name=None):
+	    """Place a snapshot of this graph in shared memory, see
+	    pygraphs.from_shared_memory. Returns the SharedMemory block."""
+	    return self.freeze().to_shared_memory(name)
+
+	def __reduce__(self):
+	    # pickled as a binary snapshot, which is thawed back when loaded
+	    from .frozen import _thaw
+	    return (_thaw, (self.freeze(), self.directed() and self.reverse_indexed()))
+	%}
+}
+
+%extend structures::SearchTree {
+	PyObject* _columns() const { return tree_columns(*$self); }
+}
+
+%extend structures::PriorityQueue {
+	%pythoncode %{
+	def __reduce__(self):
+	    # items are restored in heap order, which keeps the same heap layout
+	    from array import array
+	    from .common import _requeue
+	    items = sorted(self.items().items(), key=lambda item: item[1])
+	    labels = [label for (label, _) in items]
+	    priorities = array('d', [self.priority(label) for label in labels])
+	    return (_requeue, (labels, priorities.tobytes()))
+	%}
+}
+
 // parse files to generate wrappers
 %include "graph.hpp"
 %include "priority_queue.hpp"
+%include "search.hpp"
+%include "disjoint_set.hpp"
 
 // explicit template instantiation
+%template(GraphLabels) std::vector<std::string>;
+%template(GraphWeights) std::vector<double>;
 %template(Graph) structures::Graph<std::string,double>;
 %template(Digraph) structures::Graph<std::string,double,true>;
 %template(GraphEdges) std::unordered_map<std::string,double>;
 %template(GraphNodes) std::unordered_map<std::string,std::unordered_map<std::string,double>>;
-%template(PriorityQueue) structures::PriorityQueue<std::string, float>;
+%template(PriorityQueue) structures::PriorityQueue<std::string,double,std::less<double>,4,std::unordered_map<std::string,int>>;
 %template(PrioItems) std::unordered_map<std::string,int>;
+%template(GraphTree) std::unordered_map<std::string,std::string>;
+%template(SearchTree) structures::SearchTree<std::string,double>;
+%template(bfs_tree) structures::breadth_first<std::string,double,false>;
+%template(bfs_tree) structures::breadth_first<std::string,double,true>;
+%template(dijkstra_tree) structures::shortest_paths<std::string,double,false>;
+%template(dijkstra_tree) structures::shortest_paths<std::string,double,true>;
 
 // type mapping
 //
@@ -9,16 +9,20 @@
 #include <vector>
 #include <tuple>
 #include <map>
+#include <unordered_map>
 #include <functional> // less
 #include <utility> // move, size_t
-#include <algorithm> // swap, transform
+#include <algorithm> // swap, transform, min
 #include <cassert>
 
 
 namespace structures {
 
-template <typename T, typename P = int, typename F = std::less<P>>
-	// requires Hashable<T>, Comparable<P>, DefaultConstructible<P>
+// d-ary heap whose elements' positions are kept in an Index map from T to int
+template <typename T, typename P = int, typename F = std::less<P>,
+          int arity = 2, typename Index = std::map<T,int>>
+	// requires Hashable<T>, Comparable<P>, DefaultConstructible<P>,
+	//          arity >= 2
 class PriorityQueue {
  public:
 	PriorityQueue() = default;
@@ -35,8 +39,8 @@ class PriorityQueue {
 	P priority(const T&) const;
 	P update(const T&, P);
 
-	// iterable container with ordered items
-	const std::map<T,int>& items() const;
+	// iterable container with items, ordered when Index is
+	const Index& items() const;
 
  private:
 	int parent(int) const;
@@ -48,57 +52,61 @@ class PriorityQueue {
 	void exchange(int, int);
 
 	std::vector<std::tuple<P,std::size_t,T>> heap_;
-	std::map<T,int> index_map_;
+	Index index_map_;
 	std::size_t count_{0};
 };
 
+// 4-ary heap with O(1) position lookups, meant for double-weighted graph search
+template <typename T, typename P = double, typename F = std::less<P>>
+using HashedPriorityQueue = PriorityQueue<T,P,F,4,std::unordered_map<T,int>>;
 
-template <typename T, typename P, typename F>
-PriorityQueue<T,P,F>::PriorityQueue(int size)
+
+template <typename T, typename P, typename F, int D, typename I>
+PriorityQueue<T,P,F,D,I>::PriorityQueue(int size)
 {
 	assert(size > 0);
 	heap_.reserve(size);
 }
 
-template <typename T, typename P, typename F>
-inline bool PriorityQueue<T,P,F>::empty() const
+template <typename T, typename P, typename F, int D, typename I>
+inline bool PriorityQueue<T,P,F,D,I>::empty() const
 {
 	return heap_.empty();
 }
 
-template <typename T, typename P, typename F>
-inline int PriorityQueue<T,P,F>::size() const
+template <typename T, typename P, typename F, int D, typename I>
+inline int PriorityQueue<T,P,F,D,I>::size() const
 {
 	return static_cast<int>(heap_.size());
 }
 
-template <typename T, typename P, typename F>
-inline bool PriorityQueue<T,P,F>::contains(const T& elem) const
+template <typename T, typename P, typename F, int D, typename I>
+inline bool PriorityQueue<T,P,F,D,I>::contains(const T& elem) const
 {
 	return index_map_.find(elem) != index_map_.end();
 }
 
-template <typename T, typename P, typename F>
-const T& PriorityQueue<T,P,F>::front() const
+template <typename T, typename P, typename F, int D, typename I>
+const T& PriorityQueue<T,P,F,D,I>::front() const
 {
 	assert(size() > 0);
 	return std::get<2>(heap_[0]);
 }
 
-template <typename T, typename P, typename F>
-inline int PriorityQueue<T,P,F>::parent(int child) const
+template <typename T, typename P, typename F, int D, typename I>
+inline int PriorityQueue<T,P,F,D,I>::parent(int child) const
 {
-	return (child - 1) / 2;
+	return (child - 1) / D;
 }
 
-template <typename T, typename P, typename F>
-inline int PriorityQueue<T,P,F>::children(int parent) const
+template <typename T, typename P, typename F, int D, typename I>
+inline int PriorityQueue<T,P,F,D,I>::children(int parent) const
 {
-	return 2*parent + 1;
+	return D*parent + 1; // first of D consecutive children
 }
 
-template <typename T, typename P, typename Comp>
-inline bool PriorityQueue<T,P,Comp>::priorize(
+template <typename T, typename P, typename Comp, int D, typename I>
+inline bool PriorityQueue<T,P,Comp,D,I>::priorize(
 	const std::tuple<P,std::size_t,T>& lhs,
 	const std::tuple<P,std::size_t,T>& rhs
 ) {
@@ -108,16 +116,16 @@ inline bool PriorityQueue<T,P,Comp>::priorize(
 		       && std::get<1>(lhs) < std::get<1>(rhs));
 }
 
-template <typename T, typename P, typename F>
-void PriorityQueue<T,P,F>::exchange(int a, int b)
+template <typename T, typename P, typename F, int D, typename I>
+void PriorityQueue<T,P,F,D,I>::exchange(int a, int b)
 {
 	index_map_[std::get<2>(heap_[a])] = b;
 	index_map_[std::get<2>(heap_[b])] = a;
 	std::swap(heap_[a], heap_[b]);
 }
 
-template <typename T, typename P, typename F>
-void PriorityQueue<T,P,F>::sift(int leaf)
+template <typename T, typename P, typename F, int D, typename I>
+void PriorityQueue<T,P,F,D,I>::sift(int leaf)
 {
 	while (leaf > 0) {
 		const int root = parent(leaf);
@@ -130,17 +138,18 @@ void PriorityQueue<T,P,F>::sift(int leaf)
 	}
 }
 
-template <typename T, typename P, typename F>
-void PriorityQueue<T,P,F>::sink(int root)
+template <typename T, typename P, typename F, int D, typename I>
+void PriorityQueue<T,P,F,D,I>::sink(int root)
 {
 	while (children(root) < size()) {
-		const int leaf = children(root);
+		const int first = children(root);
+		const int last = std::min(first + D, size());
 		int swap = root;
 
-		if (priorize(heap_[leaf], heap_[root]))
-			swap = leaf;
-		if (leaf+1 < size() && priorize(heap_[leaf+1], heap_[swap]))
-			swap = leaf + 1;
+		for (int leaf = first; leaf < last; ++leaf) {
+			if (priorize(heap_[leaf], heap_[swap]))
+				swap = leaf;
+		}
 		if (swap == root)
 			break;
 
@@ -149,8 +158,8 @@ void PriorityQueue<T,P,F>::sink(int root)
 	}
 }
 
-template <typename T, typename P, typename F>
-void PriorityQueue<T,P,F>::enqueue(T elem, P prio)
+template <typename T, typename P, typename F, int D, typename I>
+void PriorityQueue<T,P,F,D,I>::enqueue(T elem, P prio)
 {
 	if (!contains(elem)) {
 		auto entry = std::make_tuple(std::move(prio), count_++, elem);
@@ -163,8 +172,8 @@ void PriorityQueue<T,P,F>::enqueue(T elem, P prio)
 	}
 }
 
-template <typename T, typename P, typename F>
-T PriorityQueue<T,P,F>::dequeue()
+template <typename T, typename P, typename F, int D, typename I>
+T PriorityQueue<T,P,F,D,I>::dequeue()
 {
 	assert(size() > 0);
 	const auto top = std::get<2>(heap_[0]);
@@ -175,8 +184,8 @@ T PriorityQueue<T,P,F>::dequeue()
 	return top;
 }
 
-template <typename T, typename P, typename Comp>
-P PriorityQueue<T,P,Comp>::priority(const T& elem) const
+template <typename T, typename P, typename Comp, int D, typename I>
+P PriorityQueue<T,P,Comp,D,I>::priority(const T& elem) const
 {
 	assert(contains(elem));
 	const auto pos = index_map_.find(elem);
@@ -186,8 +195,8 @@ P PriorityQueue<T,P,Comp>::priority(const T& elem) const
 		return std::get<0>(heap_[pos->second]);
 }
 
-template <typename T, typename P, typename Comp>
-P PriorityQueue<T,P,Comp>::update(const T& elem, P prio)
+template <typename T, typename P, typename Comp, int D, typename I>
+P PriorityQueue<T,P,Comp,D,I>::update(const T& elem, P prio)
 {
 	const auto pos = index_map_.find(elem);
 	if (pos == index_map_.end())
@@ -207,8 +216,8 @@ P PriorityQueue<T,P,Comp>::update(const T& elem, P prio)
 	return old;
 }
 
-template <typename T, typename P, typename F>
-const std::map<T,int>& PriorityQueue<T,P,F>::items() const
+template <typename T, typename P, typename F, int D, typename I>
+const I& PriorityQueue<T,P,F,D,I>::items() const
 {
 	return index_map_;
 }
@@ -0,0 +1,151 @@
+/*
+ * Copyright (c) 2019 Gabriel B. Sant'Anna <baiocchi.gabriel@gmail.com>
+ * @License Apache <https://gitlab.com/baioc/pygraphs>
+ */
+
+#ifndef STRUCTURES_SEARCH_HPP
+#define STRUCTURES_SEARCH_HPP
+
+#include "graph.hpp"
+#include "priority_queue.hpp"
+
+#include <vector>
+#include <deque>
+#include <unordered_map>
+#include <unordered_set>
+#include <limits> // infinity
+#include <queue>
+#include <functional> // reference_wrapper, greater
+#include <utility> // pair
+
+
+namespace structures {
+
+using std::unordered_map;
+
+template <typename Label, typename Weight>
+struct SearchTree {
+	std::vector<Label> order; // reached nodes in visiting order, root first
+	unordered_map<Label,Weight> distance;
+	unordered_map<Label,Label> antecessor; // the root has no antecessor
+};
+
+template <typename Label, typename Weight, bool direct>
+SearchTree<Label,Weight> breadth_first(const Graph<Label,Weight,direct>&,
+                                       const Label&);
+
+template <typename Label, typename Weight, bool direct>
+SearchTree<Label,Weight> shortest_paths(const Graph<Label,Weight,direct>&,
+                                        const Label&);
+
+
+// distances are the depth (number of hops) of each node reached from the root
+template <typename L, typename W, bool d>
+SearchTree<L,W> breadth_first(const Graph<L,W,d>& graph, const L& root)
+{
+	SearchTree<L,W> tree;
+	if (!graph.contains(root))
+		return tree;
+
+	tree.distance.reserve(graph.node_number());
+	tree.distance.emplace(root, 0);
+	tree.order.push_back(root);
+
+	std::deque<L> queue{root};
+	while (!queue.empty()) {
+		const L& u = queue.front();
+		const W depth = tree.distance[u] + 1;
+
+		for (const auto& adj: graph.neighbours(u)) {
+			const L& v = adj.first;
+			if (tree.distance.emplace(v, depth).second) {
+				tree.antecessor.emplace(v, u);
+				tree.order.push_back(v);
+				queue.push_back(v);
+			}
+		}
+
+		queue.pop_front();
+	}
+
+	return tree;
+}
+
+// Dijkstra's algorithm; every node is given a distance, infinity if unreachable
+template <typename L, typename W, bool d>
+SearchTree<L,W> shortest_paths(const Graph<L,W,d>& graph, const L& source)
+{
+	constexpr W inf = std::numeric_limits<W>::infinity();
+
+	SearchTree<L,W> tree;
+	tree.distance.reserve(graph.node_number());
+	if (!graph.contains(source)) {
+		for (const auto& assoc: graph.nodes())
+			tree.distance.emplace(assoc.first, inf);
+		return tree;
+	}
+
+	// the search runs on integer ids, so labels are only hashed (and never
+	// copied) to find each arc's target
+	using Key = std::reference_wrapper<const L>;
+	std::unordered_map<Key,int,std::hash<L>,std::equal_to<L>> id;
+	id.reserve(graph.node_number());
+	std::vector<const L*> labels;
+	std::vector<const unordered_map<L,W>*> adjacency;
+	std::vector<W*> distance; // unordered_map elements never move
+	labels.reserve(graph.node_number());
+	adjacency.reserve(graph.node_number());
+	distance.reserve(graph.node_number());
+	for (const auto& assoc: graph.nodes()) {
+		id.emplace(assoc.first, labels.size());
+		labels.push_back(&assoc.first);
+		adjacency.push_back(&assoc.second);
+		distance.push_back(&tree.distance.emplace(assoc.first, inf).first->second);
+	}
+
+	const int n = labels.size();
+	std::vector<int> antecessor(n, -1);
+	std::vector<bool> closed(n, false);
+
+	// lazy deletion: outdated entries are skipped once popped
+	using Entry = std::pair<W,int>;
+	std::priority_queue<Entry,std::vector<Entry>,std::greater<Entry>> open;
+	const int s = id.find(source)->second;
+	*distance[s] = 0;
+	open.emplace(0, s);
+
+	while (!open.empty()) {
+		const auto [du, u] = open.top();
+		open.pop();
+		if (closed[u])
+			continue;
+		closed[u] = true;
+		tree.order.push_back(*labels[u]);
+
+		for (const auto& adj: *adjacency[u]) {
+			const int v = id.find(adj.first)->second;
+			if (closed[v])
+				continue;
+
+			// relax
+			const W duv = du + adj.second;
+			if (duv < *distance[v]) {
+				*distance[v] = duv;
+				antecessor[v] = u;
+				open.emplace(duv, v);
+			}
+		}
+	}
+
+	tree.antecessor.reserve(tree.order.size());
+	for (int v = 0; v < n; ++v) {
+		if (antecessor[v] >= 0)
+			tree.antecessor.emplace(*labels[v], *labels[antecessor[v]]);
+	}
+
+	return tree;
+}
+
+} // namespace structures
+
+#endif // STRUCTURES_SEARCH_HPP
@@ -3,3 +3,7 @@
 
 #include "test_graph.inc"
 #include "test_priority_queue.inc"
+#include "test_frozen_graph.inc"
+#include "test_search.inc"
+#include "test_disjoint_set.inc"
+#include "test_concurrency.inc"
@@ -1,4 +1,4 @@
-from .libpygraphs import Graph, Digraph, PriorityQueue
+from .libpygraphs import Graph, Digraph, PriorityQueue, DisjointSet
 
 from math import inf
 from typing import NewType as _NewType
@@ -6,9 +6,12 @@ from typing import NewType as _NewType
 Label = _NewType('Label', str)
 Weight = _NewType('Weight', float)
 
-from .common import graph_edges, arbitrary
+from .common import graph_edges, arbitrary, CycleError
+from .frozen import FrozenGraph, freeze, load, from_shared_memory
 from .search import breadth_first, depth_first
 from .cycle import eulerian_cycle, hamiltonian_circuit
-from .path import shortest_routes, shortest_paths, shortest_network
-from .forest import min_tree, toposort, components
-from .flow import max_flow, max_matching
+from .path import shortest_routes, shortest_paths, shortest_path, \
+    shortest_network, shortest_paths_many, sparse_network, distance_matrix, \
+    PathTree, astar
+from .forest import min_tree, min_forest, toposort, components
+from .flow import max_flow, min_cut, min_cost_flow, max_matching
@@ -1,4 +1,5 @@
-from .libpygraphs import Graph, Digraph
+from .libpygraphs import Graph, Digraph, PriorityQueue
+from array import array
 from typing import TypeVar, Sequence, Generator, Tuple, Union, Dict
 
 
@@ -12,6 +13,59 @@ Node = str  # label type
 
 def graph_edges(g: Union[Graph, Digraph]) \
         -> Generator[Tuple[Node, Node], None, None]:
-    for u in g.nodes():
-        for v in g.neighbours(u):
+    for u in g.nodes_list():
+        for (v, _) in g.neighbours_list(u):
             yield (u, v)
+
+
+class CycleError(ValueError):
+    """Signals a cycle which prevents some algorithm from producing a result.
+    The offending cycle is kept as a node trail, its first node repeated."""
+
+    def __init__(self, message: str, cycle: Sequence[Node]):
+        super().__init__(message)
+        self.cycle = cycle
+
+
+def _requeue(items: Sequence[str], priorities: bytes) -> PriorityQueue:
+    # unpickles a PriorityQueue
+    queue = PriorityQueue()
+    for (item, priority) in zip(items, array('d', priorities)):
+        queue.enqueue(item, priority)
+    return queue
+
+
+def _test_link():
+    # bulk insertion takes sequences, iterables and numeric arrays or buffers
+    from array import array
+    for weights in ([1, 2, 3], (1.0, 2.0, 3.0), array('i', [1, 2, 3]),
+                    memoryview(array('d', [1, 2, 3]))):
+        G = Graph()
+        assert G.link_many(['a', 'b', 'c'], ('b', 'c', 'a'), weights) == 3
+        assert G.weight('c', 'a') == 3.0 and G.edge_number() == 3
+    D = Digraph()
+    D.link_many(['a', 'b'], iter(['b', 'c']), [1.5, 2.5])
+    assert D.weight('b', 'c') == 2.5
+
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+    if np is not None:
+        for dtype in (np.float64, np.float32, np.int64, np.int8):
+            G = Graph()
+            G.link_many(np.array(['a', 'b']), ['b', 'c'],
+                        np.array([1, 2], dtype=dtype))
+            assert G.weight('b', 'c') == 2.0
+
+    # mismatched columns are rejected before anything is inserted
+    for (sources, targets, weights) in ((['a'], ['b', 'c'], []),
+                                        (['a', 'b'], ['b', 'c'], [1.0])):
+        G = Graph()
+        try:
+            G.link_many(sources, targets, weights)
+        except ValueError:
+            assert G.node_number() == 0
+        else:
+            assert False, "mismatched columns were accepted"
+    print("link_many ok")
@@ -2,116 +2,210 @@
 # @License Apache <https://gitlab.com/baioc/pygraphs>
 
 from .libpygraphs import Digraph, Graph
-from .common import Node, graph_edges, arbitrary
-from typing import Union, Optional, Sequence, Tuple, List, Set, Dict, FrozenSet
+from .common import Node, arbitrary
+from typing import Union, Optional, Sequence, Tuple, List, Set
 from math import inf
-from itertools import combinations
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:  # optional, only used to vectorize Held-Karp's layers
+    np = None
 
 
 def eulerian_cycle(graph: Union[Graph, Digraph], start: Optional[Node] = None) \
         -> Optional[Sequence[Node]]:
-    """Finds an eulerian cycle on a graph using Hierholzer's algorithm.
+    """Finds an eulerian cycle on a graph using Hierholzer's algorithm, with
+    a cursor into each node's arcs of a CSR snapshot. Graphs with any odd
+    degree (or unbalanced in and out degrees) are rejected without a search.
     Returns a list representing the node trail or None when no such cycle
-    is found. O(E)"""
-
-    traversed: Set[Tuple[Node, Node]] = set()
-
-    def Hierholzer(initial: Node) -> List[Node]:
-        cycle = [initial]
-
-        u = initial
-        while True:
-            e = None
-            for v in graph.neighbours(u):
-                if (u, v) not in traversed:
-                    e = (u, v)
-                    break
-            else:  # no break: every edge (u,v) has already been traversed
-                return None
-
-            (u, v) = e
-            cycle.append(v)
-
-            traversed.add(e)
-            if not graph.directed():
-                traversed.add((v, u))
-
-            u = v
-            if u == initial:
-                break
-
-        for v in cycle:
-            for w in graph.neighbours(v):
-                if (v, w) not in traversed:
-                    subcycle = Hierholzer(v)
-                    if subcycle is None:
-                        return subcycle
-                    else:
-                        # splice internal subcycle into full cycle
-                        pos = cycle.index(subcycle[0])
-                        cycle =  cycle[:pos] + subcycle + cycle[pos+1:]
-
-        return cycle
+    is found. O(V+E)"""
 
-    start = arbitrary(graph.nodes()) if start is None else start
-    cycle = Hierholzer(start)
+    snapshot = graph.freeze()
+    (offsets, targets) = (snapshot.offsets, snapshot.targets)
+    n = snapshot.node_number()
+    directed = snapshot.directed()
 
-    if cycle is None:
-        return cycle
+    start = arbitrary(graph.nodes()) if start is None else start
+    if start not in snapshot.index:
+        return None
 
-    for (u, v) in graph_edges(graph):
-        if (u, v) not in traversed:
+    if directed:
+        balance = [offsets[u+1] - offsets[u] for u in range(n)]
+        for v in targets:
+            balance[v] -= 1
+        if any(balance):
             return None
+    elif any((offsets[u+1] - offsets[u]) % 2 for u in range(n)):
+        return None
+
+    # undirected edges are stored as two arcs, the twin one is marked as used
+    used = bytearray(0 if directed else len(targets))
+    cursor = list(offsets[:-1])
 
-    return cycle
+    # walks unused arcs with an explicit stack, backtracking into the cycle
+    # whenever a node is left without any of them; this splices each subcycle
+    # found along the way into place
+    trail: List[int] = []
+    stack = [snapshot.index[start]]
+    while stack:
+        u = stack[-1]
+        (a, end) = (cursor[u], offsets[u+1])
+        while a < end and not directed and used[a]:
+            a += 1
 
+        if a < end:
+            cursor[u] = a + 1
+            v = targets[a]
+            if not directed:
+                used[bisect_left(targets, u, offsets[v], offsets[v+1])] = True
+            stack.append(v)
+        else:
+            cursor[u] = a
+            trail.append(stack.pop())
+
+    # the cycle must cover every edge, which may be in other components
+    edges = len(targets) if directed else len(targets) // 2
+    if edges == 0 or len(trail) != edges + 1:
+        return None
 
-def hamiltonian_circuit(graph: Union[Graph, Digraph], start: Node) \
+    # nodes were backtracked from, so the trail is reversed
+    return [snapshot.labels[v] for v in reversed(trail)]
+
+
+def hamiltonian_circuit(graph: Union[Graph, Digraph], start: Node,
+                        workers: int = 1) \
         -> Optional[Tuple[Sequence[Node], float]]:
-    """Finds a graph's minimal hamiltonian circuit through Held-Karp.
+    """Finds a graph's minimal hamiltonian circuit through Held-Karp, with
+    subsets of nodes as bitmasks indexing a dense table of 2^(V-1) * (V-1)
+    costs, which is filled in layers of equal cardinality. When NumPy is
+    available, each layer is vectorized, and its nodes may be split between
+    a number of worker threads.
     Returns a tuple containing the optimal tour and its cost or None if there's
     no such cycle. O(2^V * V^2)"""
 
-    # Visits, FinalDestination, Cost = FrozenSet[Node], Node, float
-    cost: Dict[Tuple[FrozenSet[Node], Node], float] = {}
-    dests = frozenset({v for v in graph.nodes() if v != start})
+    if not graph.contains(start):
+        return None
+
+    # every other node gets a bit, while the start takes the last index
+    snapshot = graph.freeze()
+    dests = [v for v in snapshot.labels if v != start]
+    k = len(dests)
+    ids = {v: i for (i, v) in enumerate(dests)}
+    ids[start] = k
+
+    # missing arcs are infinitely expensive
+    weights = [[inf] * (k + 1) for _ in range(k + 1)]
+    for (i, u) in enumerate(snapshot.labels):
+        for a in snapshot.arcs(i):
+            v = snapshot.labels[snapshot.targets[a]]
+            weights[ids[u]][ids[v]] = snapshot.weights[a]
+
+    if k == 0:
+        return None
+    elif np is not None:
+        circuit = _held_karp_vectorized(np.array(weights), k, workers)
+    else:
+        circuit = _held_karp(weights, k)
+
+    if circuit is None:
+        return None
+    else:
+        (tour, minimum) = circuit
+        path = [start] + [dests[i] for i in tour] + [start]
+        return (path, minimum)
 
-    for place in dests:
-        cost[(frozenset({place}), place)] = graph.weight(start, place)
 
-    for size in range(2, graph.node_number()):
-        for itinerary in combinations(dests, size):
-            route = frozenset(itinerary)
-            for final in route:
-                sub = route - {final}
-                opt = inf  # optimal solution for problem subset
-                for mid in sub:
-                    opt = min(opt, cost[(sub, mid)] + graph.weight(mid, final))
-                cost[(route, final)] = opt
+def _held_karp(weights: List[List[float]], k: int) \
+        -> Optional[Tuple[List[int], float]]:
+    # cost of the shortest path from the start (index k) through a subset of
+    # nodes and ending at j is kept at [subset * k + j], along with its parent;
+    # subsets are visited in numerical order, after all of their own subsets
+    cost = [inf] * ((1 << k) * k)
+    parent = [-1] * ((1 << k) * k)
+    for j in range(k):
+        cost[(1 << j) * k + j] = weights[k][j]
 
-    minimum = inf
-    for end in dests:
-        minimum = min(minimum, cost[(dests, end)] + graph.weight(end, start))
+    for subset in range(1, 1 << k):
+        for j in range(k):
+            prior = subset ^ (1 << j)
+            if not subset >> j & 1 or prior == 0:
+                continue
+            (best, via) = (inf, -1)
+            for i in range(k):
+                if prior >> i & 1:
+                    c = cost[prior * k + i] + weights[i][j]
+                    if c < best:
+                        (best, via) = (c, i)
+            cost[subset * k + j] = best
+            parent[subset * k + j] = via
 
-    # check if no circuit was found
+    full = (1 << k) - 1
+    (minimum, last) = min((cost[full * k + j] + weights[j][k], j)
+                          for j in range(k))
     if minimum == inf:
         return None
 
-    # backtrack to find full path
-    circuit = minimum
-    path: List[Node] = [start]
+    tour: List[int] = []
+    (subset, j) = (full, last)
+    while j >= 0:
+        tour.append(j)
+        (subset, j) = (subset ^ (1 << j), parent[subset * k + j])
+
+    tour.reverse()
+    return (tour, minimum)
+
 
-    for _ in range(graph.node_number() - 1):
-        for (route, final), opt in cost.items():
-            if (circuit - graph.weight(final, path[-1]) == opt):
-                path.append(final)
-                circuit = opt
-                break
+def _held_karp_vectorized(weights, k: int, workers: int) \
+        -> Optional[Tuple[List[int], float]]:
+    # same table as a 2^k by k array; entries for nodes outside the subset stay
+    # infinite, so every node can be tried as a predecessor at once
+    cost = np.full((1 << k, k), inf)
+    parent = np.full((1 << k, k), -1, dtype=np.int8)
+    cost[1 << np.arange(k), np.arange(k)] = weights[k, :k]
 
-    path.append(start)
-    path.reverse()
+    subsets = np.arange(1 << k)
+    cardinality = np.zeros(1 << k, dtype=np.int8)
+    for j in range(k):
+        cardinality += (subsets >> j) & 1
 
-    return (path, minimum)
+    def extend(layer, j: int):
+        ending = layer[(layer >> j) & 1 == 1]
+        through = cost[ending ^ (1 << j)] + weights[:k, j]
+        best = through.argmin(axis=1)
+        cost[ending, j] = through[np.arange(len(ending)), best]
+        parent[ending, j] = best
+
+    # within a layer, paths ending at different nodes are independent
+    pool = ThreadPoolExecutor(workers) if workers > 1 else None
+    try:
+        for size in range(2, k + 1):
+            layer = subsets[cardinality == size]
+            if pool is None:
+                for j in range(k):
+                    extend(layer, j)
+            else:
+                list(pool.map(lambda j: extend(layer, j), range(k)))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    full = (1 << k) - 1
+    closing = cost[full] + weights[:k, k]
+    last = int(closing.argmin())
+    minimum = float(closing[last])
+    if minimum == inf:
+        return None
+
+    tour: List[int] = []
+    (subset, j) = (full, last)
+    while j >= 0:
+        tour.append(j)
+        (subset, j) = (subset ^ (1 << j), int(parent[subset, j]))
+
+    tour.reverse()
+    return (tour, minimum)
 
 
 def _test_cycle():
@@ -126,3 +220,48 @@ def _test_cycle():
 
     C = eulerian_cycle(G, 'a')
     print(C)
+
+
+def _test_circuit():
+    # Held-Karp, in every flavor, against brute force over all permutations
+    global np
+    from itertools import permutations
+    from random import Random
+    rng = Random(19)
+    vectorized = np
+    for n in range(1, 8):
+        for G in (Graph(), Digraph()):
+            for u in range(n):
+                G.insert(str(u))
+                for v in range(n):
+                    if u != v and rng.random() < 0.6:
+                        G.link(str(u), str(v), rng.randint(1, 20))
+
+            arcs = {u: dict(G.neighbours_list(u)) for u in G.nodes()}
+            best = None
+            for order in permutations([v for v in G.nodes() if v != '0']):
+                tour = ['0'] + list(order) + ['0']
+                if all(v in arcs[u] for (u, v) in zip(tour, tour[1:])):
+                    cost = sum(arcs[u][v] for (u, v) in zip(tour, tour[1:]))
+                    best = cost if best is None else min(best, cost)
+            if n == 1:
+                best = None  # a lone node makes no circuit
+
+            found = [hamiltonian_circuit(G, '0'),
+                     hamiltonian_circuit(G, '0', workers=3)]
+            try:
+                np = None
+                found.append(hamiltonian_circuit(G, '0'))
+            finally:
+                np = vectorized
+
+            for circuit in found:
+                if best is None:
+                    assert circuit is None, (n, G.directed())
+                    continue
+                (tour, cost) = circuit
+                assert cost == best, (n, G.directed())
+                assert tour[0] == tour[-1] == '0'
+                assert sorted(tour[1:]) == sorted(G.nodes())
+                assert cost == sum(arcs[u][v] for (u, v) in zip(tour, tour[1:]))
+    print("hamiltonian_circuit ok")
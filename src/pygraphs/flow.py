@@ -2,48 +2,330 @@
 # @License Apache <https://gitlab.com/baioc/pygraphs>
 
 from .libpygraphs import Graph, Digraph
-from .common import Node, graph_edges
+from .common import Node, CycleError
+from .frozen import FrozenGraph
+from .path import _csr_dijkstra, _csr_spfa
 from math import inf
-from typing import Dict, Tuple, Set, Generator, Sequence
+from typing import Dict, Tuple, Set, List, Mapping
 from collections import deque
 
 
-def max_flow(graph: Digraph, source: Node, sink: Node) \
-        -> Dict[Tuple[Node, Node], float]:
-    """Find the maximum flow through a digraph by Edmonds-Karp FFA. O(V * E^3)
+def max_flow(graph: Digraph, source: Node, sink: Node,
+             method: str = 'dinic') -> Dict[Tuple[Node, Node], float]:
+    """Find the maximum flow through a network whose weights are capacities,
+    either with Dinic's algorithm, O(V^2 * E), or with highest-label
+    push-relabel and the gap heuristic, O(V^2 * sqrt(E)), by method name.
     Returns a dictionary maping edges to their maximum flow in the network."""
 
-    flow = {pipe: 0 for pipe in graph_edges(graph)}
-
-    def residue(u: Node, v: Node) -> float:
-        return graph.weight(u, v) - flow[(u, v)]
-
-    while True:
-        pred: Dict[Node, Node] = {}
-
-        queue = deque()
-        queue.append(source)
+    residual = _Residual(graph.freeze())
+    residual.solve(source, sink, method)
+    return residual.flows()
+
+
+def min_cut(graph: Digraph, source: Node, sink: Node, method: str = 'dinic') \
+        -> Tuple[float, Set[Node], Set[Tuple[Node, Node]]]:
+    """Find a minimum cut separating source from sink, by means of a maximum
+    flow computed with the given method (see max_flow).
+    Returns a tuple with the cut's capacity, the set of nodes on the source's
+    side and the set of edges crossing the cut."""
+
+    residual = _Residual(graph.freeze())
+    value = residual.solve(source, sink, method)
+    return (value,) + residual.cut(source)
+
+
+def min_cost_flow(graph: Digraph, costs: Mapping[Tuple[Node, Node], float],
+                  source: Node, sink: Node, amount: float = inf) \
+        -> Tuple[Dict[Tuple[Node, Node], float], float]:
+    """Route a given amount of flow (by default, the maximum flow) from source
+    to sink at minimum total cost, where weights are capacities and the costs
+    map each edge to its price per unit of flow (zero when missing).
+    Uses successive shortest paths, with Johnson potentials keeping reduced
+    costs non-negative for Dijkstra's algorithm. O(F * E*lg(V))
+    Returns a tuple with a dictionary maping edges to their flow and the total
+    cost of that flow; less than the amount is routed if it is unfeasible.
+    Raises a CycleError if the source reaches a negative cost cycle."""
+
+    residual = _Residual(graph.freeze())
+    total = residual.route(source, sink, costs, amount)
+    return (residual.flows(), total)
+
+
+_EPSILON = 1e-12  # relative tolerance for floating point residues
+
+
+class _Residual:
+    # residual network with integer ids, where arc e is paired with its
+    # reverse e ^ 1; even arcs are the original ones, odd ones start empty
+
+    def __init__(self, graph: FrozenGraph):
+        self.graph = graph
+        n = graph.node_number()
+        self.head: List[int] = []
+        self.capacity: List[float] = []
+        self.adjacent: List[List[int]] = [[] for _ in range(n)]
+
+        for u in range(n):
+            for a in graph.arcs(u):
+                v = graph.targets[a]
+                e = len(self.head)
+                self.head += (v, u)
+                self.capacity += (graph.weights[a], 0.0)
+                self.adjacent[u].append(e)
+                self.adjacent[v].append(e ^ 1)
+
+        self.residue = list(self.capacity)
+        # residues below this are rounding errors, relative to capacities
+        self.epsilon = _EPSILON * max((c for c in self.capacity if c < inf),
+                                      default=0.0)
+
+    def solve(self, source: Node, sink: Node, method: str) -> float:
+        index = self.graph.index
+        if source not in index or sink not in index or source == sink:
+            return 0
+        elif method == 'dinic':
+            return self._dinic(index[source], index[sink])
+        elif method == 'push_relabel':
+            return self._push_relabel(index[source], index[sink])
+        else:
+            raise ValueError("Unknown max flow method '{}'".format(method))
+
+    def flows(self) -> Dict[Tuple[Node, Node], float]:
+        labels = self.graph.labels
+        flow: Dict[Tuple[Node, Node], float] = {}
+        for e in range(0, len(self.head), 2):
+            (u, v) = (labels[self.head[e ^ 1]], labels[self.head[e]])
+            flow[(u, v)] = self.capacity[e] - self.residue[e]
+
+        if not self.graph.directed():
+            # cancel opposite flows through the same edge
+            for (u, v) in flow:
+                back = min(flow[(u, v)], flow[(v, u)])
+                flow[(u, v)] -= back
+                flow[(v, u)] -= back
+
+        return flow
+
+    def cut(self, source: Node) -> Tuple[Set[Node], Set[Tuple[Node, Node]]]:
+        labels = self.graph.labels
+        reached = self._reach(self.graph.index[source])
+        side = {labels[u] for u in range(len(labels)) if reached[u] >= 0}
+        crossing = set()
+        for e in range(0, len(self.head), 2):
+            (u, v) = (self.head[e ^ 1], self.head[e])
+            if reached[u] >= 0 and reached[v] < 0:
+                crossing.add((labels[u], labels[v]))
+        return (side, crossing)
+
+    def route(self, source: Node, sink: Node,
+              costs: Mapping[Tuple[Node, Node], float], amount: float) -> float:
+        (labels, index) = (self.graph.labels, self.graph.index)
+        if source not in index or sink not in index or source == sink:
+            return 0
+        (s, t) = (index[source], index[sink])
+        (head, residue, adjacent) = (self.head, self.residue, self.adjacent)
+        eps = self.epsilon
+        n = len(adjacent)
+
+        cost: List[float] = []
+        symmetric = not self.graph.directed()
+        for e in range(0, len(head), 2):
+            uv = (labels[head[e ^ 1]], labels[head[e]])
+            c = costs.get(uv, 0)
+            if symmetric and uv not in costs:
+                c = costs.get(uv[::-1], 0)
+            cost += (c, -c)
+
+        # the residual network as a CSR whose positions map to residual arcs
+        offsets = [0] * (n + 1)
+        arcs: List[int] = []
+        for u in range(n):
+            arcs += adjacent[u]
+            offsets[u + 1] = len(arcs)
+        targets = [head[e] for e in arcs]
+
+        def reduced(potential: List[float]) -> List[float]:
+            # saturated arcs are left out with an infinite weight
+            return [cost[e] + potential[head[e ^ 1]] - potential[head[e]]
+                    if residue[e] > eps else inf for e in arcs]
+
+        # initial potentials handle negative costs, if any
+        potential = [inf] * n
+        potential[s] = 0
+        (_, cycle) = _csr_spfa(offsets, targets, reduced([0] * n), potential)
+        if cycle is not None:
+            cycle = [labels[v] for v in cycle]
+            raise CycleError("Negative cost cycle found near ({}, {})"
+                             .format(cycle[0], cycle[1]), cycle)
+        potential = [p if p < inf else 0 for p in potential]
+
+        (routed, total) = (0, 0)
+        while routed < amount:
+            weights = reduced(potential)
+            (dist, pred) = _csr_dijkstra(offsets, targets, weights, s)
+            if dist[t] == inf:
+                break
+
+            for v in range(n):
+                if dist[v] < inf:
+                    potential[v] += dist[v]
+
+            # recover the arcs of the path, each the cheapest one to its node
+            path: List[int] = []
+            v = t
+            while v != s:
+                u = pred[v]
+                a = min((a for a in range(offsets[u], offsets[u+1])
+                         if targets[a] == v), key=weights.__getitem__)
+                path.append(arcs[a])
+                v = u
+
+            pushed = min(amount - routed, min(residue[e] for e in path))
+            for e in path:
+                residue[e] -= pushed
+                residue[e ^ 1] += pushed
+                total += pushed * cost[e]
+            routed += pushed
+
+        return total
+
+    def _reach(self, s: int) -> List[int]:
+        # BFS levels through arcs with residual capacity, -1 if unreachable
+        (head, residue, adjacent) = (self.head, self.residue, self.adjacent)
+        eps = self.epsilon
+        level = [-1] * len(adjacent)
+        level[s] = 0
+        queue = deque([s])
         while queue:
             u = queue.popleft()
-            for v in graph.neighbours(u):
-                if v not in pred and v != source and residue(u, v) > 0:
-                    pred[v] = u
+            for e in adjacent[u]:
+                v = head[e]
+                if residue[e] > eps and level[v] < 0:
+                    level[v] = level[u] + 1
                     queue.append(v)
-
-        if sink not in pred:
-            break
-
-        capacity = inf
-        v = sink
-        while v in pred:
-            u = pred[v]
-            capacity = min(capacity, residue(u, v))
-            v = u
-
-        for uv in flow.keys():
-            flow[uv] += capacity
-
-    return flow
+        return level
+
+    def _dinic(self, s: int, t: int) -> float:
+        (head, residue, adjacent) = (self.head, self.residue, self.adjacent)
+        eps = self.epsilon
+        total = 0
+
+        while True:
+            level = self._reach(s)
+            if level[t] < 0:
+                return total
+
+            # blocking flow: advance along the level graph with current-arc
+            # pointers, retreating from (and pruning) dead ends
+            current = [0] * len(adjacent)
+            path: List[int] = []
+            u = s
+            while True:
+                if u == t:
+                    pushed = min(residue[e] for e in path)
+                    for e in path:
+                        residue[e] -= pushed
+                        residue[e ^ 1] += pushed
+                    total += pushed
+                    path.clear()
+                    u = s
+                    continue
+
+                arcs = adjacent[u]
+                while current[u] < len(arcs):
+                    e = arcs[current[u]]
+                    if residue[e] > eps and level[head[e]] == level[u] + 1:
+                        break
+                    current[u] += 1
+
+                if current[u] < len(arcs):
+                    e = arcs[current[u]]
+                    path.append(e)
+                    u = head[e]
+                elif u == s:
+                    break
+                else:
+                    level[u] = -1
+                    e = path.pop()
+                    u = head[e ^ 1]
+                    current[u] += 1
+
+    def _push_relabel(self, s: int, t: int) -> float:
+        (head, residue, adjacent) = (self.head, self.residue, self.adjacent)
+        eps = self.epsilon
+        n = len(adjacent)
+        height = [0] * n
+        excess = [0.0] * n
+        count = [0] * (2*n + 1)  # nodes per height, for the gap heuristic
+        active: List[List[int]] = [[] for _ in range(2*n + 1)]
+        current = [0] * n
+
+        height[s] = n
+        count[0] = n - 1
+        count[n] = 1
+
+        def push(e: int, amount: float):
+            v = head[e]
+            residue[e] -= amount
+            residue[e ^ 1] += amount
+            if excess[v] <= eps and v != s and v != t:
+                active[height[v]].append(v)
+            excess[v] += amount
+            excess[head[e ^ 1]] -= amount
+
+        for e in adjacent[s]:
+            if residue[e] > eps:
+                push(e, residue[e])
+
+        # always discharge the highest active node; buckets are lazily
+        # cleaned, so popped nodes may be outdated
+        highest = 0
+        while highest >= 0:
+            if not active[highest]:
+                highest -= 1
+                continue
+
+            u = active[highest].pop()
+            if height[u] != highest or excess[u] <= eps:
+                continue
+
+            arcs = adjacent[u]
+            while excess[u] > eps:
+                if current[u] == len(arcs):
+                    # relabel
+                    old = height[u]
+                    new = 2*n
+                    for e in arcs:
+                        if residue[e] > eps:
+                            new = min(new, height[head[e]] + 1)
+                    count[old] -= 1
+                    count[new] += 1
+                    height[u] = new
+                    current[u] = 0
+
+                    if count[old] == 0 and old < n:
+                        # gap: nodes above it can no longer reach the sink
+                        for v in range(n):
+                            if old < height[v] < n:
+                                count[height[v]] -= 1
+                                count[n + 1] += 1
+                                height[v] = n + 1
+                                current[v] = 0
+                                if excess[v] > eps and v != u:
+                                    active[n + 1].append(v)
+                                    highest = max(highest, n + 1)
+                    continue
+
+                e = arcs[current[u]]
+                if residue[e] > eps and height[u] == height[head[e]] + 1:
+                    push(e, min(excess[u], residue[e]))
+                else:
+                    current[u] += 1
+
+            # relabeling may have activated nodes above the previous highest
+            highest = max(highest, height[u] - 1)
+
+        return excess[t]
 
 
 def max_matching(graph: Graph, partu: Set[Node], partv: Set[Node]) \
@@ -68,7 +350,7 @@ def max_matching(graph: Graph, partu: Set[Node], partv: Set[Node]) \
         while queue:
             u = queue.popleft()
             if dist[u] < dist[None]:
-                for v in graph.neighbours(u):
+                for (v, _) in graph.neighbours_list(u):
                     w = mate[v]
                     if dist[w] == inf:
                        dist[w] = dist[u] + 1
@@ -76,20 +358,30 @@ def max_matching(graph: Graph, partu: Set[Node], partv: Set[Node]) \
 
         return dist[None] != inf
 
-    def dfs_match(u: Node) -> bool:
-        if u is None:
-            return True
-
-        for v in graph.neighbours(u):
-            w = mate[v]
-            if dist[w] == dist[u] + 1:
-                if dfs_match(w):
-                    mate[v] = u
-                    mate[u] = v
-                    return True
-        else: # no break
-            dist[u] = inf
-            return False
+    def dfs_match(root: Node) -> bool:
+        # explicit stack along an alternating path, with the pending
+        # neighbours of each node and the one it was left through
+        path = [[root, iter(graph.neighbours_list(root)), None]]
+        while path:
+            step = path[-1]
+            u = step[0]
+            for (v, _) in step[1]:
+                w = mate[v]
+                if dist[w] == dist[u] + 1:
+                    step[2] = v
+                    if w is None:
+                        # augment by matching every node to where it went
+                        for (u, _, v) in path:
+                            mate[v] = u
+                            mate[u] = v
+                        return True
+                    path.append([w, iter(graph.neighbours_list(w)), None])
+                    break
+            else:  # no break
+                dist[u] = inf
+                path.pop()
+
+        return False
 
     for u in partu:
         dist[u] = inf
@@ -136,6 +428,39 @@ def _test_flow():
         print(pipe, flow)
 
 
+def _test_cost():
+    # known optimum: 2 units through S-B-T, 2 through S-A-B-T, 2 through S-A-T
+    arcs = {('S', 'A'): (4, 2), ('S', 'B'): (2, 2), ('A', 'B'): (2, 1),
+            ('A', 'T'): (3, 3), ('B', 'T'): (5, 1)}
+    G = Digraph()
+    for ((u, v), (capacity, _)) in arcs.items():
+        G.link(u, v, capacity)
+    costs = {e: cost for (e, (_, cost)) in arcs.items()}
+
+    (F, total) = min_cost_flow(G, costs, 'S', 'T')
+    assert total == 24
+    assert F == {('S', 'A'): 4, ('S', 'B'): 2, ('A', 'B'): 2,
+                 ('A', 'T'): 2, ('B', 'T'): 4}
+    value = sum(f for ((u, _), f) in max_flow(G, 'S', 'T').items() if u == 'S')
+    assert value == F[('S', 'A')] + F[('S', 'B')]
+
+    (F, total) = min_cost_flow(G, costs, 'S', 'T', 3)
+    assert total == 10 and F[('S', 'B')] == 2 and F[('A', 'T')] == 0
+    (F, total) = min_cost_flow(G, costs, 'S', 'T', 100)  # unfeasible
+    assert total == 24
+
+    G.link('A', 'C', 1)
+    G.link('C', 'A', 1)
+    costs.update({('A', 'C'): -5, ('C', 'A'): 1})
+    try:
+        min_cost_flow(G, costs, 'S', 'T')
+    except CycleError as error:
+        assert set(error.cycle) == {'A', 'C'}
+    else:
+        assert False, "negative cost cycle not found"
+    print("min_cost_flow ok")
+
+
 def _test_match():
     X: Set[Node] = {'a', 'b', 'c'}
     Y: Set[Node] = {'d', 'e', 'f'}
@@ -1,103 +1,296 @@
 # Copyright (c) 2019 Gabriel B. Sant'Anna <baiocchi.gabriel@gmail.com>
 # @License Apache <https://gitlab.com/baioc/pygraphs>
 
-from .libpygraphs import Digraph, Graph, PriorityQueue
-from .common import Node, arbitrary
-from typing import Set, Tuple, Dict, Optional, Sequence, Union, Iterable, List
-from math import inf
+from .libpygraphs import Digraph, Graph, PriorityQueue, DisjointSet
+from .common import Node, arbitrary, CycleError
+from typing import Set, Tuple, Dict, Sequence, Union, Iterable, List
 from collections import deque
 
+try:
+    import numpy as np
+except ImportError:  # optional, only used to vectorize Boruvka's rounds
+    np = None
+
 
-# @TODO: min_forest with Kruskall <- data structure for Disjoint Sets
 def min_tree(graph: Graph, root: Node = None) -> Set[Tuple[Node, Node, float]]:
-    """Find the minimum spanning tree of an undirected graph through Prim.
+    """Find the minimum spanning tree of the root's component in an undirected
+    graph through Prim, only enqueueing nodes as they're reached.
     Returns a set containing every edge in the MSP.  O((V+E)*lg(V))"""
 
     root = arbitrary(graph.nodes()) if root is None else root
-    ancestors: Dict[Node, Optional[Node]] = {}
+    if root is None or not graph.contains(root):
+        return set()
+
+    ancestors: Dict[Node, Tuple[Node, float]] = {}
+    spanned: Set[Node] = set()
     queue = PriorityQueue()
-    for v in graph.nodes():
-        ancestors[v] = None
-        queue.enqueue(v, inf if v != root else 0)
+    queue.enqueue(root, 0)
 
     while not queue.empty():
         u = queue.dequeue()
-        for v in graph.neighbours(u):
-            w = graph.weight(u, v)
-            if queue.contains(v) and w < queue.priority(v):
-                ancestors[v] = u
-                queue.update(v, w)
-
-    forest: Set[Tuple[Node, Node, float]] = set()
-    for (v, u) in ancestors.items():
-        if u is not None:
-            forest.add((u, v, graph.weight(u, v)))
-
-    return forest
+        spanned.add(u)
+        for (v, w) in graph.neighbours_list(u):
+            if v in spanned:
+                continue
+            elif not queue.contains(v) or w < queue.priority(v):
+                ancestors[v] = (u, w)
+                queue.enqueue(v, w)  # also updates priority if already queued
+
+    return {(u, v, w) for (v, (u, w)) in ancestors.items()}
+
+
+def min_forest(graph: Graph, method: str = 'kruskal') \
+        -> Set[Tuple[Node, Node, float]]:
+    """Find a minimum spanning forest, with a tree for every component of an
+    undirected graph, either by Kruskal's algorithm on a DisjointSet or by
+    Boruvka's, whose rounds are vectorized when NumPy is available.
+    Returns a set containing every edge in the forest. O(E*lg(V))"""
+
+    snapshot = graph.freeze()
+    (offsets, targets, weights) = \
+        (snapshot.offsets, snapshot.targets, snapshot.weights)
+    n = snapshot.node_number()
+
+    # undirected edges are stored twice in the snapshot, only one is needed
+    directed = snapshot.directed()
+    sources: List[int] = []
+    arcs: List[int] = []
+    for u in range(n):
+        for a in range(offsets[u], offsets[u+1]):
+            if directed or u < targets[a]:
+                sources.append(u)
+                arcs.append(a)
+
+    if method == 'kruskal':
+        chosen = _kruskal(n, sources, arcs, targets, weights)
+    elif method == 'boruvka':
+        chosen = _boruvka(n, sources, arcs, targets, weights)
+    else:
+        raise ValueError("Unknown spanning forest method '{}'".format(method))
+
+    labels = snapshot.labels
+    return {(labels[sources[e]], labels[targets[arcs[e]]], weights[arcs[e]])
+            for e in chosen}
+
+
+def _kruskal(n: int, sources: Sequence[int], arcs: Sequence[int],
+             targets: Sequence[int], weights: Sequence[float]) -> List[int]:
+    # positions (in sources and arcs) of the edges in the forest
+    sets = DisjointSet(n)
+    chosen: List[int] = []
+    for e in sorted(range(len(arcs)), key=lambda e: weights[arcs[e]]):
+        if sets.unite(sources[e], targets[arcs[e]]):
+            chosen.append(e)
+            if len(chosen) == n - 1:
+                break
+
+    return chosen
+
+
+def _boruvka(n: int, sources: Sequence[int], arcs: Sequence[int],
+             targets: Sequence[int], weights: Sequence[float]) -> List[int]:
+    # every round joins each component through its cheapest edge; ties are
+    # broken by position, so that no cycle can ever be formed
+    if np is not None:
+        positions = np.asarray(arcs, dtype=np.int64)
+        return _boruvka_vectorized(n, np.asarray(sources, dtype=np.int64),
+                                   np.asarray(targets)[positions],
+                                   np.asarray(weights)[positions])
+
+    sets = DisjointSet(n)
+    chosen: List[int] = []
+    edges = range(len(arcs))
+    while edges:
+        cheapest: Dict[int, int] = {}
+        for e in edges:
+            for root in (sets.find(sources[e]), sets.find(targets[arcs[e]])):
+                best = cheapest.get(root)
+                if best is None or \
+                        (weights[arcs[e]], e) < (weights[arcs[best]], best):
+                    cheapest[root] = e
+
+        for e in cheapest.values():
+            if sets.unite(sources[e], targets[arcs[e]]):
+                chosen.append(e)
+
+        edges = [e for e in edges
+                 if not sets.same(sources[e], targets[arcs[e]])]
+
+    return chosen
+
+
+def _boruvka_vectorized(n: int, sources, targets, weights) -> List[int]:
+    # components are labeled by a root node, hooked onto one another and
+    # then flattened by pointer jumping, with whole arrays at each step
+    m = len(sources)
+    order = np.lexsort((np.arange(m), weights))
+    rank = np.empty(m, dtype=np.int64)
+    rank[order] = np.arange(m)
+
+    component = np.arange(n)
+    live = np.arange(m)
+    chosen = []
+    while True:
+        (cu, cv) = (component[sources[live]], component[targets[live]])
+        crossing = cu != cv
+        (live, cu, cv) = (live[crossing], cu[crossing], cv[crossing])
+        if live.size == 0:
+            break
+
+        best = np.full(n, m, dtype=np.int64)
+        np.minimum.at(best, cu, rank[live])
+        np.minimum.at(best, cv, rank[live])
+        roots = np.flatnonzero(best < m)
+        picked = order[best[roots]]
+        chosen.append(np.unique(picked))
+
+        # two components picking each other share an edge: the lesser wins
+        (pu, pv) = (component[sources[picked]], component[targets[picked]])
+        other = np.where(pu == roots, pv, pu)
+        parent = np.arange(n)
+        parent[roots] = other
+        mutual = (parent[other] == roots) & (roots < other)
+        parent[roots[mutual]] = roots[mutual]
+
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+        component = parent[component]
+
+    return np.concatenate(chosen).tolist() if chosen else []
 
 
 def toposort(graph: Digraph) -> Sequence[Node]:
     """Topologically sort a directed graph's vertices using Tarjan's DFS.
-    Returns a sequence containing the result of the partial ordering. O(V+E)"""
+    Returns a sequence containing the result of the partial ordering.
+    Raises a CycleError (a ValueError) when the graph isn't acyclic, with one
+    of its cycles in the error's cycle attribute. O(V+E)"""
 
-    visited: Set[Node] = set()
+    # nodes on the current DFS path are open, finished ones are closed
+    closed: Set[Node] = set()
+    opened: Set[Node] = set()
     order = deque()
 
-    def dfs_ord(u: Node):
-        if u not in visited:
-            visited.add(u)
-
-            for v in graph.neighbours(u):
-                dfs_ord(v)
-
-            order.appendleft(u)
-
-    for u in graph.nodes():
-        dfs_ord(u)
+    for root in graph.nodes_list():
+        if root in closed:
+            continue
+
+        opened.add(root)
+        path = [root]
+        pending = [iter(graph.neighbours_list(root))]
+        while path:
+            u = path[-1]
+            for (v, _) in pending[-1]:
+                if v in opened:
+                    cycle = path[path.index(v):] + [v]
+                    raise CycleError("Cycle found near ({}, {})".format(u, v),
+                                     cycle)
+                elif v not in closed:
+                    opened.add(v)
+                    path.append(v)
+                    pending.append(iter(graph.neighbours_list(v)))
+                    break
+            else:  # no break: every successor is finished
+                path.pop()
+                pending.pop()
+                opened.remove(u)
+                closed.add(u)
+                order.appendleft(u)
 
     return order
 
 
-def components(graph: Union[Digraph, Graph]) -> Iterable[Set[Node]]:
-    """Find a graph's strongly connected components via Kosaraju's algorithm.
-    Returns an iterable containing each partition. O(V+E)"""
-
-    visited: Set[Node] = set()
-    stack: List[Node] = []
-    connections: Dict[Node, Set[Node]] = {v: set() for v in graph.nodes()}
-    components: Dict[Node, Set[Node]] = {}
-
-    def dfs_visit(u: Node):
-        if u not in visited:
-            visited.add(u)
-
-            for v in graph.neighbours(u):
-                connections[v].add(u)
-                dfs_visit(v)
-
-            stack.append(u)
-
-    def component_assign(u: Node, root: Node):
-        if u in connections.keys():
-            if root not in components:
-                components[root] = set()
-
-            components[root].add(u)
-
-            in_neighbours = connections[u]
-            connections.pop(u)
-
-            for v in in_neighbours:
-                component_assign(v, root)
-
-    for u in graph.nodes():
-        dfs_visit(u)
-
-    while stack:
-        u = stack.pop()
-        component_assign(u, u)
-
-    return components.values()
+def components(graph: Union[Digraph, Graph], condensation: bool = False) \
+        -> Union[Iterable[Set[Node]], Tuple[Digraph, Dict[Node, int]]]:
+    """Find a graph's strongly connected components via Tarjan's algorithm,
+    running on the integer ids of its CSR snapshot.
+    Returns an iterable containing each partition, in topological order.
+    When condensation is set, returns instead a tuple with the condensed DAG,
+    where component i is the node str(i) and parallel arcs are merged into
+    the lightest one, and a dictionary maping every node to its component.
+    O(V+E)"""
+
+    snapshot = graph.freeze()
+    (offsets, targets) = (snapshot.offsets, snapshot.targets)
+    n = snapshot.node_number()
+
+    # Tarjan's components are found in reverse topological order
+    component = _tarjan(offsets, targets)
+    found = max(component) + 1 if n > 0 else 0
+    component = [found - 1 - c for c in component]
+
+    if not condensation:
+        partitions: List[Set[Node]] = [set() for _ in range(found)]
+        for (i, v) in enumerate(snapshot.labels):
+            partitions[component[i]].add(v)
+        return partitions
+
+    lightest: Dict[Tuple[int, int], float] = {}
+    for u in range(n):
+        for a in range(offsets[u], offsets[u+1]):
+            uv = (component[u], component[targets[a]])
+            if uv[0] != uv[1]:
+                w = snapshot.weights[a]
+                lightest[uv] = min(w, lightest.get(uv, w))
+
+    dag = Digraph(max(found, 1))
+    for c in range(found):
+        dag.insert(str(c))
+    dag.link_many([str(u) for (u, _) in lightest],
+                  [str(v) for (_, v) in lightest], list(lightest.values()))
+
+    return (dag, dict(zip(snapshot.labels, component)))
+
+
+def _tarjan(offsets: Sequence[int], targets: Sequence[int]) -> List[int]:
+    # single pass SCC over integer ids of a CSR adjacency, with an explicit
+    # DFS path and per-node arc cursors; returns each node's component number
+    n = len(offsets) - 1
+    order = [-1] * n  # discovery order
+    low = [0] * n
+    component = [-1] * n
+    cursor = list(offsets[:-1])
+    stack: List[int] = []  # visited nodes not yet assigned a component
+    (counter, found) = (0, 0)
+
+    for root in range(n):
+        if order[root] >= 0:
+            continue
+
+        order[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        path = [root]
+        while path:
+            u = path[-1]
+            a = cursor[u]
+            if a < offsets[u+1]:
+                cursor[u] = a + 1
+                v = targets[a]
+                if order[v] < 0:
+                    order[v] = low[v] = counter
+                    counter += 1
+                    stack.append(v)
+                    path.append(v)
+                elif component[v] < 0 and order[v] < low[u]:
+                    low[u] = order[v]
+                continue
+
+            path.pop()
+            if path and low[u] < low[path[-1]]:
+                low[path[-1]] = low[u]
+
+            if low[u] == order[u]:  # u is the root of a component
+                while True:
+                    v = stack.pop()
+                    component[v] = found
+                    if v == u:
+                        break
+                found += 1
+
+    return component
 
 
 def _test_forest():
@@ -112,6 +305,49 @@ def _test_forest():
     A = min_tree(G, 'a')
     print(A)
 
+    # empty graphs and missing roots span nothing
+    print(min_tree(Graph()), min_tree(G, 'z'))
+
+
+def _test_span():
+    # every method spans each component with the same total weight as Prim
+    global np
+    from random import Random
+    rng = Random(18)
+    G = Graph()
+    for _ in range(150):
+        G.link(str(rng.randrange(60)), str(rng.randrange(60)),
+               rng.randint(1, 5))
+    G.insert('lone')
+    parts = list(components(G))
+
+    vectorized = np
+    forests = [min_forest(G, 'kruskal'), min_forest(G, 'boruvka')]
+    try:
+        np = None  # the plain Boruvka as well, even with numpy around
+        forests.append(min_forest(G, 'boruvka'))
+    finally:
+        np = vectorized
+
+    totals = {sum(w for (_, _, w) in F) for F in forests}
+    assert len(totals) == 1
+    assert totals.pop() == sum(sum(w for (_, _, w) in min_tree(G, arbitrary(p)))
+                               for p in parts)
+    for F in forests:
+        assert len(F) == G.node_number() - len(parts)
+        sets = DisjointSet(G.node_number())
+        ids = {v: i for (i, v) in enumerate(G.nodes())}
+        assert all(sets.unite(ids[u], ids[v]) for (u, v, _) in F)
+
+    assert min_forest(Graph()) == set()
+    try:
+        min_forest(G, 'prim')
+    except ValueError:
+        pass
+    else:
+        assert False, "unknown method accepted"
+    print("min_forest ok")
+
 
 def _test_sort():
     V: Set[Node] = {'5', '7', '3', '11', '8', '2', '9', '10'}
@@ -139,3 +375,42 @@ def _test_connect():
         G.link(u, v)
 
     print(components(G))
+
+
+def _test_condense():
+    # components are exactly the mutually reachable sets, in topological order
+    from random import Random
+    from .search import breadth_first
+    rng = Random(17)
+    for G in (Digraph(), Graph()):
+        for _ in range(40):
+            G.link(str(rng.randrange(20)), str(rng.randrange(20)),
+                   rng.randint(1, 9))
+        G.insert('lone')
+
+        reach = {u: {u} | {v for (v, _, _) in breadth_first(G, u)}
+                 for u in G.nodes()}
+        (dag, component) = components(G, condensation=True)
+        partitions = list(components(G))
+        assert sorted(map(sorted, partitions)) == \
+            sorted(map(sorted, {frozenset(u for u in reach[v] if v in reach[u])
+                                for v in reach}))
+        for (c, part) in enumerate(partitions):
+            assert all(component[v] == c for v in part)
+
+        assert dag.node_number() == len(partitions)
+        for u in G.nodes():
+            for (v, w) in G.neighbours_list(u):
+                (cu, cv) = (component[u], component[v])
+                assert cu <= cv or not G.directed()
+                if cu != cv:
+                    assert dag.weight(str(cu), str(cv)) <= w
+
+    H = Digraph()
+    H.link_many(['a', 'b', 'c', 'b', 'a'], ['b', 'a', 'd', 'c', 'c'],
+                [1, 1, 2, 5, 3])
+    (dag, component) = components(H, condensation=True)
+    assert [component[v] for v in 'abcd'] == [0, 0, 1, 2]
+    assert dag.weight('0', '1') == 3 and dag.weight('1', '2') == 2
+    assert dag.edge_number() == 2
+    print("components ok")
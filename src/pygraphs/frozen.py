@@ -0,0 +1,476 @@
+# Copyright (c) 2019 Gabriel B. Sant'Anna <baiocchi.gabriel@gmail.com>
+# @License Apache <https://gitlab.com/baioc/pygraphs>
+
+from .libpygraphs import Graph, Digraph
+from .common import Node
+from typing import Union, Sequence, Dict, List, Tuple, Optional, Set
+from math import inf
+from bisect import bisect_left
+from array import array
+import mmap as _mmap
+import struct
+import sys
+
+
+class FrozenGraph:
+    """Immutable compressed sparse row (CSR) snapshot of a Graph or Digraph.
+
+    Nodes are given dense integer ids, such that labels[i] is the label of node
+    i and index[label] is its id. The arcs leaving node i are stored, sorted by
+    target id, in positions offsets[i] up to offsets[i+1] of both the targets
+    and weights columns, which support the buffer protocol. Undirected edges
+    are stored once in each direction.
+
+    Besides the integer-indexed columns, a FrozenGraph offers the same read-only
+    interface as the graph it was built from, so it can be passed to any of the
+    package's algorithms (some of which detect it and take a faster path)."""
+
+    def __init__(self, directed: bool, edges: int, labels: Sequence[Node],
+                 offsets: Sequence[int], targets: Sequence[int],
+                 weights: Sequence[float]):
+        self.labels = labels
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self._directed = directed
+        self._edges = edges
+        self._indegrees: Optional[List[int]] = None
+
+    def __getattr__(self, name: str):
+        # the label index is only built once it's needed
+        if name == 'index':
+            index: Dict[Node, int] = \
+                {v: i for (i, v) in enumerate(self.labels)}
+            self.index = index
+            return index
+        raise AttributeError(name)
+
+    @classmethod
+    def from_graph(cls, graph: Union[Graph, Digraph]) -> 'FrozenGraph':
+        return cls._from_buffers(*graph._csr())
+
+    @classmethod
+    def _from_buffers(cls, directed: bool, edges: int, labels: Sequence[Node],
+                      offsets, targets, weights) -> 'FrozenGraph':
+        # columns are viewed in place, as long as the buffers are kept alive
+        return cls(directed, edges, labels, memoryview(offsets).cast('q'),
+                   memoryview(targets).cast('q'), memoryview(weights).cast('d'))
+
+    def __reduce__(self):
+        # pickled in the same binary format used by save
+        return (_unpack, (b''.join(self._pack()),))
+
+    def __enter__(self) -> 'FrozenGraph':
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+    def __del__(self):
+        # columns must be released before their shared block is closed
+        if '_memory' in self.__dict__:
+            try:
+                self.close()
+            except BufferError:  # still exported, left to the interpreter
+                pass
+
+    def close(self):
+        """Release the columns' views of their buffers, after which the
+        snapshot can't be used, and detach from its shared memory block, if
+        any. Raises a BufferError while views of the columns taken elsewhere
+        (e.g. NumPy arrays) are alive."""
+        for column in (self.offsets, self.targets, self.weights):
+            if isinstance(column, memoryview):
+                column.release()
+        memory = self.__dict__.get('_memory')
+        if memory is not None:
+            memory.close()
+            del self._memory
+
+    def freeze(self) -> 'FrozenGraph':
+        return self
+
+    def thaw(self, reverse_index: bool = False) -> Union[Graph, Digraph]:
+        """Rebuild a mutable graph with the same nodes and edges, which may be
+        a reverse indexed Digraph. O(V+E)"""
+        graph = (Digraph if self._directed else Graph)(max(len(self.labels), 1),
+                                                        reverse_index)
+        for v in self.labels:
+            graph.insert(v)
+
+        (labels, targets) = (self.labels, self.targets)
+        (sources, sinks, weights) = ([], [], [])
+        for u in range(len(labels)):
+            for a in self.arcs(u):
+                v = targets[a]
+                if self._directed or u < v:
+                    sources.append(labels[u])
+                    sinks.append(labels[v])
+                    weights.append(self.weights[a])
+
+        graph.link_many(sources, sinks, weights)
+        return graph
+
+    def save(self, path: str):
+        """Write this snapshot to a binary file, which can be read back with
+        load. The format is a versioned header followed by the CSR columns, as
+        little-endian 64-bit integers and floats, and the labels table."""
+        with open(path, 'wb') as file:
+            for part in self._pack():
+                file.write(part)
+
+    def to_shared_memory(self, name: Optional[str] = None):
+        """Copy this snapshot, in the binary format used by save, into a new
+        block of shared memory, which other processes can attach to (by its
+        name) with from_shared_memory. Returns the SharedMemory block, which
+        its creator should eventually close and unlink. Requires Python 3.8+."""
+        SharedMemory = _shared_memory()
+
+        parts = self._pack()
+        size = sum(memoryview(part).nbytes for part in parts)
+        memory = SharedMemory(name, create=True, size=max(size, 1))
+        _created.add(memory.name)
+        position = 0
+        for part in parts:
+            part = memoryview(part).cast('B')
+            memory.buf[position:position + part.nbytes] = part
+            position += part.nbytes
+
+        return memory
+
+    def _pack(self) -> List:
+        # buffers making up the binary format, in order
+        blobs = [v.encode('utf-8') for v in self.labels]
+        spans = array('q', [0])
+        for b in blobs:
+            spans.append(spans[-1] + len(b))
+
+        flags = _DIRECTED if self._directed else 0
+        header = _HEADER.pack(_MAGIC, _VERSION, flags, len(self.labels),
+                              len(self.targets), self._edges, spans[-1])
+        columns = [_little_endian(column, code) for (column, code)
+                   in ((self.offsets, 'q'), (self.targets, 'q'),
+                       (self.weights, 'd'), (spans, 'q'))]
+        return [header] + columns + [b''.join(blobs)]
+
+    def directed(self) -> bool:
+        return self._directed
+
+    def node_number(self) -> int:
+        return len(self.labels)
+
+    def edge_number(self) -> int:
+        return self._edges
+
+    def arc_number(self) -> int:
+        return len(self.targets)
+
+    def transposed(self) -> 'FrozenGraph':
+        """Snapshot with every arc reversed, which is itself if undirected."""
+        if not self._directed:
+            return self
+
+        n = len(self.labels)
+        offsets = array('q', bytes(8 * (n + 1)))
+        for v in self.targets:
+            offsets[v + 1] += 1
+        for i in range(n):
+            offsets[i + 1] += offsets[i]
+
+        # scanning sources in order keeps the reversed rows sorted
+        fill = array('q', offsets[:-1])
+        targets = array('q', bytes(8 * len(self.targets)))
+        weights = array('d', bytes(8 * len(self.weights)))
+        for u in range(n):
+            for a in range(self.offsets[u], self.offsets[u+1]):
+                v = self.targets[a]
+                targets[fill[v]] = u
+                weights[fill[v]] = self.weights[a]
+                fill[v] += 1
+
+        return FrozenGraph(True, self._edges, self.labels,
+                           offsets, targets, weights)
+
+    def arcs(self, i: int) -> range:
+        """Positions of the arcs leaving node with id i."""
+        return range(self.offsets[i], self.offsets[i+1])
+
+    def contains(self, node_from: Node, node_to: Optional[Node] = None) -> bool:
+        if node_to is None:
+            return node_from in self.index
+        else:
+            return self._arc(node_from, node_to) is not None
+
+    def degree(self, node: Node) -> int:
+        if not self._directed:
+            return self.degree_out(node)
+        elif node not in self.index:
+            return -1
+        else:
+            return self.degree_out(node) + self.degree_in(node)
+
+    def degree_out(self, node: Node) -> int:
+        i = self.index.get(node)
+        return -1 if i is None else self.offsets[i+1] - self.offsets[i]
+
+    def degree_in(self, node: Node) -> int:
+        if not self._directed:
+            return self.degree_out(node)
+
+        i = self.index.get(node)
+        if i is None:
+            return -1
+
+        if self._indegrees is None:
+            self._indegrees = [0] * len(self.labels)
+            for v in self.targets:
+                self._indegrees[v] += 1
+
+        return self._indegrees[i]
+
+    def weight(self, node_from: Node, node_to: Node) -> float:
+        # same conventions as Graph::weight
+        if node_from == node_to:
+            return inf if self._directed else 0
+
+        a = self._arc(node_from, node_to)
+        if a is not None:
+            return self.weights[a]
+        else:
+            return 0 if self._directed else inf
+
+    def reverse_indexed(self) -> bool:
+        return not self._directed
+
+    def nodes(self) -> Sequence[Node]:
+        return self.labels
+
+    def nodes_list(self) -> List[Node]:
+        return list(self.labels)
+
+    def neighbours(self, node: Node) -> Dict[Node, float]:
+        i = self.index.get(node)
+        if i is None:
+            return {}
+
+        labels, targets, weights = self.labels, self.targets, self.weights
+        return {labels[targets[a]]: weights[a] for a in self.arcs(i)}
+
+    def neighbours_list(self, node: Node) -> List[Tuple[Node, float]]:
+        i = self.index.get(node)
+        if i is None:
+            return []
+
+        labels, targets, weights = self.labels, self.targets, self.weights
+        return [(labels[targets[a]], weights[a]) for a in self.arcs(i)]
+
+    def predecessors(self, node: Node) -> Dict[Node, float]:
+        # like a Digraph without a reverse index, only undirected ones know it
+        return {} if self._directed else self.neighbours(node)
+
+    def predecessors_list(self, node: Node) -> List[Tuple[Node, float]]:
+        return [] if self._directed else self.neighbours_list(node)
+
+    def _arc(self, node_from: Node, node_to: Node) -> Optional[int]:
+        u = self.index.get(node_from)
+        v = self.index.get(node_to)
+        if u is None or v is None:
+            return None
+
+        # rows are sorted by target id
+        (begin, end) = (self.offsets[u], self.offsets[u+1])
+        a = bisect_left(self.targets, v, begin, end)
+        return a if a < end and self.targets[a] == v else None
+
+
+def freeze(graph: Union[Graph, Digraph, FrozenGraph]) -> FrozenGraph:
+    """Builds an immutable CSR snapshot of a graph. O(V + E*lg(E/V))"""
+    return graph.freeze()
+
+
+def load(path: str, mmap: bool = True) -> FrozenGraph:
+    """Reads a snapshot saved to a binary file. When mmap is set, its columns
+    are views of the memory mapped file, so pages are loaded on demand and
+    shared by every process reading it, and only the labels are decoded.
+    Raises a ValueError if the file isn't in a known format. O(V)"""
+
+    with open(path, 'rb') as file:
+        if mmap:
+            buffer = _mmap.mmap(file.fileno(), 0, access=_mmap.ACCESS_READ)
+        else:
+            buffer = file.read()
+
+    return _unpack(buffer, "'{}'".format(path))
+
+
+def from_shared_memory(name: str) -> FrozenGraph:
+    """Attaches to a snapshot placed in shared memory by to_shared_memory.
+    Its columns are views of the shared block, which is kept open until the
+    snapshot is closed (or collected), so they're never copied. Requires
+    Python 3.8+. O(V)"""
+    SharedMemory = _shared_memory()
+
+    try:  # readers shouldn't unlink the block when they exit
+        memory = SharedMemory(name, track=False)
+    except TypeError:  # before Python 3.13, attaching also tracks it
+        memory = SharedMemory(name)
+        _untrack(memory)
+
+    graph = _unpack(memory.buf, "Shared memory '{}'".format(name))
+    graph._memory = memory
+    return graph
+
+
+def _shared_memory():
+    try:
+        from multiprocessing.shared_memory import SharedMemory
+    except ImportError:  # only pickling works on older versions
+        raise ImportError("Shared memory snapshots require Python 3.8 or"
+                          " later, use pickle or save instead") from None
+    return SharedMemory
+
+
+def _untrack(memory):
+    # a resource tracker started by this process would unlink the block once
+    # it exits, but one shared with the block's creator (which is inherited by
+    # its child processes) must keep tracking it until the creator unlinks it
+    from multiprocessing import resource_tracker
+    if memory.name not in _created \
+            and resource_tracker._resource_tracker._pid is not None:
+        resource_tracker.unregister(memory._name, 'shared_memory')
+
+
+def _unpack(buffer, origin: str = 'Buffer') -> FrozenGraph:
+    # reads the binary format, viewing columns in place whenever possible
+    if len(buffer) < _HEADER.size:
+        raise ValueError("{} is truncated".format(origin))
+    (magic, version, flags, nodes, arcs, edges, text) = \
+        _HEADER.unpack_from(buffer)
+    if magic != _MAGIC:
+        raise ValueError("{} is not a graph file".format(origin))
+    elif not 1 <= version <= _VERSION:
+        raise ValueError("Unsupported graph file version {}".format(version))
+    elif min(nodes, arcs, edges, text) < 0:
+        raise ValueError("{} has a corrupt header".format(origin))
+
+    # sections follow the header in order, every column is 8-byte aligned
+    view = memoryview(buffer)
+    sizes = ((nodes + 1, 'q'), (arcs, 'q'), (arcs, 'd'), (nodes + 1, 'q'))
+    columns = []
+    position = _HEADER.size
+    for (length, code) in sizes:
+        end = position + 8 * length
+        if end > len(view):
+            raise ValueError("{} is truncated".format(origin))
+        columns.append(_native(view[position:end], code))
+        position = end
+    if len(view) < position + text:
+        raise ValueError("{} is truncated".format(origin))
+
+    (offsets, targets, weights, spans) = columns
+    blob = bytes(view[position:position + text])
+    decoded = blob.decode('utf-8')
+    if len(decoded) == len(blob):  # ASCII, where bytes and characters match
+        labels = [decoded[a:b] for (a, b) in zip(spans, spans[1:])]
+    else:
+        labels = [blob[a:b].decode('utf-8') for (a, b) in zip(spans, spans[1:])]
+
+    return FrozenGraph(bool(flags & _DIRECTED), edges, labels,
+                       offsets, targets, weights)
+
+
+def _thaw(snapshot: FrozenGraph, reverse_index: bool) -> Union[Graph, Digraph]:
+    # unpickles a Graph or Digraph
+    return snapshot.thaw(reverse_index)
+
+
+# magic, version, flags, nodes, arcs, edges, and label bytes
+_HEADER = struct.Struct('<8sIIqqqq')
+_MAGIC = b'PYGRAPHS'
+_VERSION = 1
+_DIRECTED = 1
+
+_created: Set[str] = set()  # shared memory blocks made by this process
+
+
+def _little_endian(column, code: str):
+    if sys.byteorder == 'little':
+        return column
+    swapped = array(code, column)
+    swapped.byteswap()
+    return swapped
+
+
+def _native(view: memoryview, code: str):
+    # views in place when possible, otherwise copies in the host's byte order
+    if sys.byteorder == 'little':
+        return view.cast(code)
+    swapped = array(code, view.tobytes())
+    swapped.byteswap()
+    return swapped
+
+
+def _test_files():
+    # snapshots survive the binary format, while damaged files are refused
+    G = Digraph()
+    G.link_many(['a', 'b', 'c'], ['b', 'c', 'a'], [1.0, 2.0, 3.0])
+    G.insert('d')
+    data = b''.join(G.freeze()._pack())
+
+    H = _unpack(data).thaw()
+    assert sorted(H.nodes()) == sorted(G.nodes())
+    assert H.weight('c', 'a') == 3.0 and H.edge_number() == 3
+
+    for length in range(len(data)):
+        try:
+            _unpack(data[:length])
+        except ValueError:
+            pass
+        else:
+            assert False, "truncated at {} bytes".format(length)
+
+    fields = _HEADER.unpack_from(data)
+    for (i, value) in ((0, b'PYGRAPHZ'), (1, 0), (1, _VERSION + 1),
+                       (3, -1), (4, -1), (5, -1), (6, -1)):
+        corrupt = list(fields)
+        corrupt[i] = value
+        try:
+            _unpack(_HEADER.pack(*corrupt) + data[_HEADER.size:])
+        except ValueError:
+            pass
+        else:
+            assert False, "corrupt header field {} was accepted".format(i)
+    print("binary format ok")
+
+
+def _test_shared():
+    # other processes attach to a block, which outlives them, without warnings
+    import subprocess
+    from multiprocessing import get_context
+
+    G = Graph()
+    G.link_many(['a', 'b'], ['b', 'c'], [1.0, 2.0])
+    memory = G.to_shared_memory()
+    try:
+        with get_context('spawn').Pool(1) as pool:
+            assert pool.apply(_shared_degree, (memory.name, 'b')) == 2
+
+        script = ('import pygraphs as pyg\n'
+                  'with pyg.from_shared_memory({!r}) as snapshot:\n'
+                  '    print(snapshot.weight("c", "b"))\n').format(memory.name)
+        child = subprocess.run([sys.executable, '-c', script], check=True,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               universal_newlines=True)
+        assert child.stdout.strip() == '2.0' and not child.stderr, child.stderr
+
+        with from_shared_memory(memory.name) as snapshot:
+            assert snapshot.edge_number() == 2
+    finally:
+        memory.close()
+        memory.unlink()
+    print("shared memory ok")
+
+
+def _shared_degree(name: str, node: Node) -> int:
+    with from_shared_memory(name) as snapshot:
+        return snapshot.degree(node)
@@ -0,0 +1,340 @@
+# Copyright (c) 2019 Gabriel B. Sant'Anna <baiocchi.gabriel@gmail.com>
+# @License Apache <https://gitlab.com/baioc/pygraphs>
+
+from .libpygraphs import Graph, Digraph
+from .common import Node
+from typing import Union, Optional, Iterable, Tuple, List, Dict, TextIO, \
+    Generator
+from contextlib import contextmanager
+from itertools import chain
+from xml.etree.ElementTree import XMLParser
+from xml.sax.saxutils import quoteattr
+import csv
+
+Source = Union[str, TextIO]  # either a path or an open text file
+# columns of sources, targets and weights, followed by any isolated nodes
+Chunk = Tuple[List[Node], List[Node], List[float], List[Node]]
+
+CHUNK = 1 << 16  # edges per bulk insertion
+
+
+def read_edgelist(source: Source, directed: bool = False,
+                  graph: Optional[Union[Graph, Digraph]] = None,
+                  delimiter: Optional[str] = None, comments: str = '#',
+                  chunk: int = CHUNK) -> Union[Graph, Digraph]:
+    """Load a graph from a text file with an edge per line, made up of its
+    source, target and optional weight (1 by default), split on delimiter
+    (any whitespace when None). Lines with a single label are isolated nodes
+    and anything after a comments token is ignored.
+    Edges are inserted into the given graph, or into a new one, in bulk."""
+
+    with _opened(source, 'r') as file:
+        return _load(_edgelist_chunks(file, delimiter, comments, chunk),
+                     directed, graph)
+
+
+def read_csv(source: Source, directed: bool = False,
+             graph: Optional[Union[Graph, Digraph]] = None,
+             columns: Tuple[str, str, str] = ('source', 'target', 'weight'),
+             chunk: int = CHUNK, **dialect) -> Union[Graph, Digraph]:
+    """Load a graph from a CSV file whose header names the source, target and
+    (optional) weight columns. Extra keyword arguments go to csv.reader.
+    Edges are inserted into the given graph, or into a new one, in bulk."""
+
+    with _opened(source, 'r') as file:
+        return _load(_csv_chunks(file, columns, chunk, dialect),
+                     directed, graph)
+
+
+def read_graphml(source: Source,
+                 graph: Optional[Union[Graph, Digraph]] = None,
+                 chunk: int = CHUNK) -> Union[Graph, Digraph]:
+    """Load a graph from a GraphML document, parsed incrementally, whose edges
+    may have a numeric 'weight' attribute; direction follows the edgedefault.
+    Edges are inserted into the given graph, or into a new one, in bulk."""
+
+    with _opened(source, 'rb') as file:
+        handler = _GraphML()
+        parser = XMLParser(target=handler)
+
+        def chunks() -> Generator[Chunk, None, None]:
+            while True:
+                block = file.read(64 * chunk)
+                if block:
+                    parser.feed(block)
+                else:
+                    parser.close()
+                if len(handler.sources) + len(handler.nodes) >= chunk \
+                        or not block:
+                    yield handler.flush()
+                if not block:
+                    return
+
+        # graph creation waits for its edgedefault, which comes before edges
+        pending = chunks()
+        first = next(pending)
+        return _load(chain([first], pending), handler.directed, graph)
+
+
+def write_edgelist(graph: Union[Graph, Digraph], sink: Source,
+                   delimiter: str = ' ', comments: str = '#'):
+    """Stream a graph into a text file with an edge per line, as read by
+    read_edgelist. Nodes without any outgoing edges get a line of their own.
+    Raises a ValueError, as soon as it is reached, on a label which couldn't
+    be read back: empty ones, those with surrounding whitespace or containing
+    line breaks, the delimiter (any whitespace when it is blank) or comments."""
+
+    with _opened(sink, 'w') as file:
+        for (u, adjacency) in _adjacencies(graph):
+            _check_label(u, delimiter, comments)  # every node comes up once
+            if adjacency:
+                prefix = u + delimiter
+                file.writelines(prefix + v + delimiter + repr(w) + '\n'
+                                for (v, w) in adjacency)
+            elif graph.degree_out(u) == 0:
+                file.write(u + '\n')
+
+
+def write_csv(graph: Union[Graph, Digraph], sink: Source,
+              columns: Tuple[str, str, str] = ('source', 'target', 'weight'),
+              **dialect):
+    """Stream a graph's edges into a CSV file with a header, as read by
+    read_csv. Nodes without any outgoing edges get a row with empty target and
+    weight. Extra keyword arguments go to csv.writer."""
+
+    with _opened(sink, 'w') as file:
+        writer = csv.writer(file, **dialect)
+        writer.writerow(columns)
+        for (u, adjacency) in _adjacencies(graph):
+            if adjacency:
+                writer.writerows((u, v, repr(w)) for (v, w) in adjacency)
+            elif graph.degree_out(u) == 0:
+                writer.writerow((u, '', ''))
+
+
+def write_graphml(graph: Union[Graph, Digraph], sink: Source):
+    """Stream a graph into a GraphML document, with a 'weight' edge attribute,
+    as read by read_graphml."""
+
+    with _opened(sink, 'w') as file:
+        file.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                   '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+                   '  <key id="w" for="edge" attr.name="weight"'
+                   ' attr.type="double"/>\n'
+                   '  <graph edgedefault="{}">\n'
+                   .format('directed' if graph.directed() else 'undirected'))
+
+        for u in graph.nodes():
+            file.write('    <node id={}/>\n'.format(quoteattr(u)))
+        for (u, adjacency) in _adjacencies(graph):
+            source = quoteattr(u)
+            file.writelines('    <edge source={} target={}>'
+                            '<data key="w">{!r}</data></edge>\n'
+                            .format(source, quoteattr(v), w)
+                            for (v, w) in adjacency)
+
+        file.write('  </graph>\n</graphml>\n')
+
+
+def _load(chunks: Iterable[Chunk], directed: bool,
+          graph: Optional[Union[Graph, Digraph]]) -> Union[Graph, Digraph]:
+    if graph is None:
+        graph = Digraph() if directed else Graph()
+
+    for (sources, targets, weights, nodes) in chunks:
+        graph.link_many(sources, targets, weights)
+        for v in nodes:
+            graph.insert(v)
+
+    return graph
+
+
+def _edgelist_chunks(lines: Iterable[str], delimiter: Optional[str],
+                     comments: str, chunk: int) \
+        -> Generator[Chunk, None, None]:
+    (sources, targets, weights, nodes) = ([], [], [], [])
+    for line in lines:
+        if comments:
+            line = line.split(comments, 1)[0]
+        fields = line.split(delimiter)
+        if delimiter is not None:
+            fields = [f.strip() for f in fields if f.strip()]
+        if not fields:
+            continue
+
+        if len(fields) > 1:
+            sources.append(fields[0])
+            targets.append(fields[1])
+            weights.append(float(fields[2]) if len(fields) > 2 else 1.0)
+        else:
+            nodes.append(fields[0])
+
+        if len(sources) + len(nodes) >= chunk:
+            yield (sources, targets, weights, nodes)
+            (sources, targets, weights, nodes) = ([], [], [], [])
+
+    if sources or nodes:
+        yield (sources, targets, weights, nodes)
+
+
+def _csv_chunks(file: TextIO, columns: Tuple[str, str, str], chunk: int,
+                dialect) -> Generator[Chunk, None, None]:
+    reader = csv.reader(file, **dialect)
+    header = next(reader, None)
+    if header is None:
+        return
+    (source, target) = (header.index(columns[0]), header.index(columns[1]))
+    weight = header.index(columns[2]) if columns[2] in header else None
+
+    (sources, targets, weights, nodes) = ([], [], [], [])
+    for row in reader:
+        if not row:
+            continue
+        elif not row[target]:  # an isolated node
+            nodes.append(row[source])
+        else:
+            sources.append(row[source])
+            targets.append(row[target])
+            weights.append(float(row[weight]) if weight is not None else 1.0)
+
+        if len(sources) + len(nodes) >= chunk:
+            yield (sources, targets, weights, nodes)
+            (sources, targets, weights, nodes) = ([], [], [], [])
+
+    if sources or nodes:
+        yield (sources, targets, weights, nodes)
+
+
+class _GraphML:
+    # XML parser target collecting GraphML nodes and edges into columns
+
+    def __init__(self):
+        self.directed = False
+        (self.sources, self.targets, self.weights, self.nodes) = \
+            ([], [], [], [])
+        self._key: Optional[str] = None  # the weight attribute's
+        self._default = 1.0
+        self._tags: Dict[str, str] = {}  # local name of each (qualified) tag
+        self._text: Optional[List[str]] = None  # of the data being read
+        self._data: Optional[str] = None  # key of the data being read
+        self._weight = 1.0
+        self._defining = False  # within the weight key's definition
+
+    def flush(self) -> Chunk:
+        # an edge still being parsed has no weight yet, and is kept
+        n = len(self.weights)
+        chunk = (self.sources[:n], self.targets[:n], self.weights, self.nodes)
+        (self.sources, self.targets, self.weights, self.nodes) = \
+            (self.sources[n:], self.targets[n:], [], [])
+        return chunk
+
+    def start(self, tag: str, attributes: Dict[str, str]):
+        name = self._local(tag)
+        if name == 'edge':
+            self.sources.append(attributes['source'])
+            self.targets.append(attributes['target'])
+            self._weight = self._default
+        elif name == 'node':
+            self.nodes.append(attributes['id'])
+        elif name == 'data':
+            self._data = attributes.get('key')
+            self._text = []
+        elif name == 'graph':
+            self.directed = attributes.get('edgedefault') == 'directed'
+        elif name == 'key':
+            if attributes.get('for', 'all') in ('edge', 'all') and \
+                    attributes.get('attr.name') == 'weight':
+                self._key = attributes.get('id')
+                self._defining = True
+        elif name == 'default' and self._defining:
+            self._text = []
+
+    def data(self, text: str):
+        if self._text is not None:
+            self._text.append(text)
+
+    def end(self, tag: str):
+        name = self._local(tag)
+        if name == 'edge':
+            self.weights.append(self._weight)
+        elif name == 'data':
+            if self._data == self._key and self._key is not None:
+                text = ''.join(self._text).strip()
+                if text:
+                    self._weight = float(text)
+            self._text = None
+        elif name == 'default' and self._defining:
+            text = ''.join(self._text).strip()
+            if text:
+                self._default = float(text)
+            self._text = None
+        elif name == 'key':
+            self._defining = False
+
+    def _local(self, tag: str) -> str:
+        name = self._tags.get(tag)
+        if name is None:
+            name = self._tags[tag] = tag.rsplit('}', 1)[-1]
+        return name
+
+
+def _adjacencies(graph: Union[Graph, Digraph]) \
+        -> Generator[Tuple[Node, Iterable[Tuple[Node, float]]], None, None]:
+    # each node with its outgoing edges, undirected ones are listed only once
+    directed = graph.directed()
+    for u in graph.nodes():
+        adjacency = graph.neighbours(u).items()
+        if not directed:
+            adjacency = [(v, w) for (v, w) in adjacency if u < v]
+        yield (u, adjacency)
+
+
+def _check_label(label: Node, delimiter: str, comments: str):
+    # labels must survive read_edgelist's splitting, stripping and comments
+    fields = label.split(delimiter) if delimiter.strip() else label.split()
+    if fields != [label] or label != label.strip() or '\n' in label \
+            or '\r' in label or (comments and comments in label):
+        raise ValueError("Label {!r} can't be written to an edge list"
+                         " delimited by {!r}".format(label, delimiter))
+
+
+@contextmanager
+def _opened(file: Source, mode: str):
+    # paths are opened (and closed) here, open files are used as they are
+    if isinstance(file, str):
+        newline = '' if 'b' not in mode else None
+        encoding = 'utf-8' if 'b' not in mode else None
+        with open(file, mode, newline=newline, encoding=encoding) as opened:
+            yield opened
+    else:
+        yield file
+
+
+def _test_io():
+    from io import StringIO
+    from .common import graph_edges
+
+    def round_trip(write, read, graph):
+        file = StringIO()
+        write(graph, file)
+        file.seek(0)
+        copy = read(file)
+        return sorted(copy.nodes()) == sorted(graph.nodes()) \
+            and sorted(graph_edges(copy)) == sorted(graph_edges(graph))
+
+    G = Graph()
+    G.link('a', 'b', 2.5)
+    G.link('b', 'c')
+    G.insert('lonely')
+    for (write, read) in ((write_edgelist, read_edgelist),
+                          (write_csv, read_csv),
+                          (write_graphml, read_graphml)):
+        print(write.__name__, round_trip(write, read, G))
+
+    # CSV quotes labels with delimiters, while edge lists refuse them
+    G.link('tab\tx', 'a, b')
+    print('write_csv', round_trip(write_csv, read_csv, G))
+    try:
+        write_edgelist(G, StringIO())
+    except ValueError as error:
+        print(error)
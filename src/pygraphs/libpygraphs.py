@@ -1,5 +1,5 @@
 # This file was automatically generated by SWIG (http://www.swig.org).
-# Version 4.0.1
+# Version 4.0.2
 #
 # Do not make changes to this file unless you know what you are doing--modify
 # the SWIG interface file instead.
@@ -122,6 +122,247 @@ class SwigPyIterator(object):
 # Register SwigPyIterator in _libpygraphs:
 _libpygraphs.SwigPyIterator_swigregister(SwigPyIterator)
 
+class DisjointSet(object):
+    thisown = property(lambda x: x.this.own(), lambda x, v: x.this.own(v), doc="The membership flag")
+    __repr__ = _swig_repr
+
+    def __init__(self, *args):
+        _libpygraphs.DisjointSet_swiginit(self, _libpygraphs.new_DisjointSet(*args))
+
+    def size(self):
+        return _libpygraphs.DisjointSet_size(self)
+
+    def count(self):
+        return _libpygraphs.DisjointSet_count(self)
+
+    def make(self):
+        return _libpygraphs.DisjointSet_make(self)
+
+    def find(self, arg2):
+        return _libpygraphs.DisjointSet_find(self, arg2)
+
+    def unite(self, arg2, arg3):
+        return _libpygraphs.DisjointSet_unite(self, arg2, arg3)
+
+    def same(self, arg2, arg3):
+        return _libpygraphs.DisjointSet_same(self, arg2, arg3)
+    __swig_destroy__ = _libpygraphs.delete_DisjointSet
+
+# Register DisjointSet in _libpygraphs:
+_libpygraphs.DisjointSet_swigregister(DisjointSet)
+
+class GraphLabels(object):
+    thisown = property(lambda x: x.this.own(), lambda x, v: x.this.own(v), doc="The membership flag")
+    __repr__ = _swig_repr
+
+    def iterator(self):
+        return _libpygraphs.GraphLabels_iterator(self)
+    def __iter__(self):
+        return self.iterator()
+
+    def __nonzero__(self):
+        return _libpygraphs.GraphLabels___nonzero__(self)
+
+    def __bool__(self):
+        return _libpygraphs.GraphLabels___bool__(self)
+
+    def __len__(self):
+        return _libpygraphs.GraphLabels___len__(self)
+
+    def __getslice__(self, i, j):
+        return _libpygraphs.GraphLabels___getslice__(self, i, j)
+
+    def __setslice__(self, *args):
+        return _libpygraphs.GraphLabels___setslice__(self, *args)
+
+    def __delslice__(self, i, j):
+        return _libpygraphs.GraphLabels___delslice__(self, i, j)
+
+    def __delitem__(self, *args):
+        return _libpygraphs.GraphLabels___delitem__(self, *args)
+
+    def __getitem__(self, *args):
+        return _libpygraphs.GraphLabels___getitem__(self, *args)
+
+    def __setitem__(self, *args):
+        return _libpygraphs.GraphLabels___setitem__(self, *args)
+
+    def pop(self):
+        return _libpygraphs.GraphLabels_pop(self)
+
+    def append(self, x):
+        return _libpygraphs.GraphLabels_append(self, x)
+
+    def empty(self):
+        return _libpygraphs.GraphLabels_empty(self)
+
+    def size(self):
+        return _libpygraphs.GraphLabels_size(self)
+
+    def swap(self, v):
+        return _libpygraphs.GraphLabels_swap(self, v)
+
+    def begin(self):
+        return _libpygraphs.GraphLabels_begin(self)
+
+    def end(self):
+        return _libpygraphs.GraphLabels_end(self)
+
+    def rbegin(self):
+        return _libpygraphs.GraphLabels_rbegin(self)
+
+    def rend(self):
+        return _libpygraphs.GraphLabels_rend(self)
+
+    def clear(self):
+        return _libpygraphs.GraphLabels_clear(self)
+
+    def get_allocator(self):
+        return _libpygraphs.GraphLabels_get_allocator(self)
+
+    def pop_back(self):
+        return _libpygraphs.GraphLabels_pop_back(self)
+
+    def erase(self, *args):
+        return _libpygraphs.GraphLabels_erase(self, *args)
+
+    def __init__(self, *args):
+        _libpygraphs.GraphLabels_swiginit(self, _libpygraphs.new_GraphLabels(*args))
+
+    def push_back(self, x):
+        return _libpygraphs.GraphLabels_push_back(self, x)
+
+    def front(self):
+        return _libpygraphs.GraphLabels_front(self)
+
+    def back(self):
+        return _libpygraphs.GraphLabels_back(self)
+
+    def assign(self, n, x):
+        return _libpygraphs.GraphLabels_assign(self, n, x)
+
+    def resize(self, *args):
+        return _libpygraphs.GraphLabels_resize(self, *args)
+
+    def insert(self, *args):
+        return _libpygraphs.GraphLabels_insert(self, *args)
+
+    def reserve(self, n):
+        return _libpygraphs.GraphLabels_reserve(self, n)
+
+    def capacity(self):
+        return _libpygraphs.GraphLabels_capacity(self)
+    __swig_destroy__ = _libpygraphs.delete_GraphLabels
+
+# Register GraphLabels in _libpygraphs:
+_libpygraphs.GraphLabels_swigregister(GraphLabels)
+
+class GraphWeights(object):
+    thisown = property(lambda x: x.this.own(), lambda x, v: x.this.own(v), doc="The membership flag")
+    __repr__ = _swig_repr
+
+    def iterator(self):
+        return _libpygraphs.GraphWeights_iterator(self)
+    def __iter__(self):
+        return self.iterator()
+
+    def __nonzero__(self):
+        return _libpygraphs.GraphWeights___nonzero__(self)
+
+    def __bool__(self):
+        return _libpygraphs.GraphWeights___bool__(self)
+
+    def __len__(self):
+        return _libpygraphs.GraphWeights___len__(self)
+
+    def __getslice__(self, i, j):
+        return _libpygraphs.GraphWeights___getslice__(self, i, j)
+
+    def __setslice__(self, *args):
+        return _libpygraphs.GraphWeights___setslice__(self, *args)
+
+    def __delslice__(self, i, j):
+        return _libpygraphs.GraphWeights___delslice__(self, i, j)
+
+    def __delitem__(self, *args):
+        return _libpygraphs.GraphWeights___delitem__(self, *args)
+
+    def __getitem__(self, *args):
+        return _libpygraphs.GraphWeights___getitem__(self, *args)
+
+    def __setitem__(self, *args):
+        return _libpygraphs.GraphWeights___setitem__(self, *args)
+
+    def pop(self):
+        return _libpygraphs.GraphWeights_pop(self)
+
+    def append(self, x):
+        return _libpygraphs.GraphWeights_append(self, x)
+
+    def empty(self):
+        return _libpygraphs.GraphWeights_empty(self)
+
+    def size(self):
+        return _libpygraphs.GraphWeights_size(self)
+
+    def swap(self, v):
+        return _libpygraphs.GraphWeights_swap(self, v)
+
+    def begin(self):
+        return _libpygraphs.GraphWeights_begin(self)
+
+    def end(self):
+        return _libpygraphs.GraphWeights_end(self)
+
+    def rbegin(self):
+        return _libpygraphs.GraphWeights_rbegin(self)
+
+    def rend(self):
+        return _libpygraphs.GraphWeights_rend(self)
+
+    def clear(self):
+        return _libpygraphs.GraphWeights_clear(self)
+
+    def get_allocator(self):
+        return _libpygraphs.GraphWeights_get_allocator(self)
+
+    def pop_back(self):
+        return _libpygraphs.GraphWeights_pop_back(self)
+
+    def erase(self, *args):
+        return _libpygraphs.GraphWeights_erase(self, *args)
+
+    def __init__(self, *args):
+        _libpygraphs.GraphWeights_swiginit(self, _libpygraphs.new_GraphWeights(*args))
+
+    def push_back(self, x):
+        return _libpygraphs.GraphWeights_push_back(self, x)
+
+    def front(self):
+        return _libpygraphs.GraphWeights_front(self)
+
+    def back(self):
+        return _libpygraphs.GraphWeights_back(self)
+
+    def assign(self, n, x):
+        return _libpygraphs.GraphWeights_assign(self, n, x)
+
+    def resize(self, *args):
+        return _libpygraphs.GraphWeights_resize(self, *args)
+
+    def insert(self, *args):
+        return _libpygraphs.GraphWeights_insert(self, *args)
+
+    def reserve(self, n):
+        return _libpygraphs.GraphWeights_reserve(self, n)
+
+    def capacity(self):
+        return _libpygraphs.GraphWeights_capacity(self)
+    __swig_destroy__ = _libpygraphs.delete_GraphWeights
+
+# Register GraphWeights in _libpygraphs:
+_libpygraphs.GraphWeights_swigregister(GraphWeights)
+
 class Graph(object):
     thisown = property(lambda x: x.this.own(), lambda x, v: x.this.own(v), doc="The membership flag")
     __repr__ = _swig_repr
@@ -132,6 +373,9 @@ class Graph(object):
     def directed(self):
         return _libpygraphs.Graph_directed(self)
 
+    def reverse_indexed(self):
+        return _libpygraphs.Graph_reverse_indexed(self)
+
     def node_number(self):
         return _libpygraphs.Graph_node_number(self)
 
@@ -147,6 +391,23 @@ class Graph(object):
     def link(self, arg2, arg3, arg4=1):
         return _libpygraphs.Graph_link(self, arg2, arg3, arg4)
 
+    def link_many(self, *args):
+
+        # accept any iterables, not only sequences and buffers; arrays other than
+        # float64 are converted, since SWIG only takes Python numbers and strings
+        args = tuple(a.tolist() if getattr(a, 'dtype', 'float64') != 'float64'
+                     else a if hasattr(a, '__len__') else list(a) for a in args)
+
+
+        val = _libpygraphs.Graph_link_many(self, *args)
+
+        if val < 0:
+            raise ValueError("link_many columns must have the same length")
+
+
+        return val
+
+
     def unlink(self, arg2, arg3):
         return _libpygraphs.Graph_unlink(self, arg2, arg3)
 
@@ -170,6 +431,41 @@ class Graph(object):
 
     def neighbours(self, arg2):
         return _libpygraphs.Graph_neighbours(self, arg2)
+
+    def predecessors(self, arg2):
+        return _libpygraphs.Graph_predecessors(self, arg2)
+
+    def _csr(self):
+        return _libpygraphs.Graph__csr(self)
+
+    def nodes_list(self):
+        return _libpygraphs.Graph_nodes_list(self)
+
+    def neighbours_list(self, node):
+        return _libpygraphs.Graph_neighbours_list(self, node)
+
+    def predecessors_list(self, node):
+        return _libpygraphs.Graph_predecessors_list(self, node)
+
+    def freeze(self):
+        """Build an immutable compressed sparse row snapshot of this graph."""
+        from .frozen import FrozenGraph
+        return FrozenGraph.from_graph(self)
+
+    def save(self, path):
+        """Write a binary snapshot of this graph, see pygraphs.load."""
+        self.freeze().save(path)
+
+    def to_shared_memory(self, name=None):
+        """Place a snapshot of this graph in shared memory, see
+        pygraphs.from_shared_memory. Returns the SharedMemory block."""
+        return self.freeze().to_shared_memory(name)
+
+    def __reduce__(self):
+    # pickled as a binary snapshot, which is thawed back when loaded
+        from .frozen import _thaw
+        return (_thaw, (self.freeze(), self.directed() and self.reverse_indexed()))
+
     __swig_destroy__ = _libpygraphs.delete_Graph
 
 # Register Graph in _libpygraphs:
@@ -185,6 +481,9 @@ class Digraph(object):
     def directed(self):
         return _libpygraphs.Digraph_directed(self)
 
+    def reverse_indexed(self):
+        return _libpygraphs.Digraph_reverse_indexed(self)
+
     def node_number(self):
         return _libpygraphs.Digraph_node_number(self)
 
@@ -200,6 +499,23 @@ class Digraph(object):
     def link(self, arg2, arg3, arg4=1):
         return _libpygraphs.Digraph_link(self, arg2, arg3, arg4)
 
+    def link_many(self, *args):
+
+        # accept any iterables, not only sequences and buffers; arrays other than
+        # float64 are converted, since SWIG only takes Python numbers and strings
+        args = tuple(a.tolist() if getattr(a, 'dtype', 'float64') != 'float64'
+                     else a if hasattr(a, '__len__') else list(a) for a in args)
+
+
+        val = _libpygraphs.Digraph_link_many(self, *args)
+
+        if val < 0:
+            raise ValueError("link_many columns must have the same length")
+
+
+        return val
+
+
     def unlink(self, arg2, arg3):
         return _libpygraphs.Digraph_unlink(self, arg2, arg3)
 
@@ -223,6 +539,41 @@ class Digraph(object):
 
     def neighbours(self, arg2):
         return _libpygraphs.Digraph_neighbours(self, arg2)
+
+    def predecessors(self, arg2):
+        return _libpygraphs.Digraph_predecessors(self, arg2)
+
+    def _csr(self):
+        return _libpygraphs.Digraph__csr(self)
+
+    def nodes_list(self):
+        return _libpygraphs.Digraph_nodes_list(self)
+
+    def neighbours_list(self, node):
+        return _libpygraphs.Digraph_neighbours_list(self, node)
+
+    def predecessors_list(self, node):
+        return _libpygraphs.Digraph_predecessors_list(self, node)
+
+    def freeze(self):
+        """Build an immutable compressed sparse row snapshot of this graph."""
+        from .frozen import FrozenGraph
+        return FrozenGraph.from_graph(self)
+
+    def save(self, path):
+        """Write a binary snapshot of this graph, see pygraphs.load."""
+        self.freeze().save(path)
+
+    def to_shared_memory(self, name=None):
+        """Place a snapshot of this graph in shared memory, see
+        pygraphs.from_shared_memory. Returns the SharedMemory block."""
+        return self.freeze().to_shared_memory(name)
+
+    def __reduce__(self):
+    # pickled as a binary snapshot, which is thawed back when loaded
+        from .frozen import _thaw
+        return (_thaw, (self.freeze(), self.directed() and self.reverse_indexed()))
+
     __swig_destroy__ = _libpygraphs.delete_Digraph
 
 # Register Digraph in _libpygraphs:
@@ -453,6 +804,16 @@ class PriorityQueue(object):
 
     def items(self):
         return _libpygraphs.PriorityQueue_items(self)
+
+    def __reduce__(self):
+    # items are restored in heap order, which keeps the same heap layout
+        from array import array
+        from .common import _requeue
+        items = sorted(self.items().items(), key=lambda item: item[1])
+        labels = [label for (label, _) in items]
+        priorities = array('d', [self.priority(label) for label in labels])
+        return (_requeue, (labels, priorities.tobytes()))
+
     __swig_destroy__ = _libpygraphs.delete_PriorityQueue
 
 # Register PriorityQueue in _libpygraphs:
@@ -554,5 +915,124 @@ class PrioItems(object):
 # Register PrioItems in _libpygraphs:
 _libpygraphs.PrioItems_swigregister(PrioItems)
 
+class GraphTree(object):
+    thisown = property(lambda x: x.this.own(), lambda x, v: x.this.own(v), doc="The membership flag")
+    __repr__ = _swig_repr
+
+    def iterator(self):
+        return _libpygraphs.GraphTree_iterator(self)
+    def __iter__(self):
+        return self.iterator()
+
+    def __nonzero__(self):
+        return _libpygraphs.GraphTree___nonzero__(self)
+
+    def __bool__(self):
+        return _libpygraphs.GraphTree___bool__(self)
+
+    def __len__(self):
+        return _libpygraphs.GraphTree___len__(self)
+    def __iter__(self):
+        return self.key_iterator()
+    def iterkeys(self):
+        return self.key_iterator()
+    def itervalues(self):
+        return self.value_iterator()
+    def iteritems(self):
+        return self.iterator()
+
+    def __getitem__(self, key):
+        return _libpygraphs.GraphTree___getitem__(self, key)
+
+    def __delitem__(self, key):
+        return _libpygraphs.GraphTree___delitem__(self, key)
+
+    def has_key(self, key):
+        return _libpygraphs.GraphTree_has_key(self, key)
+
+    def keys(self):
+        return _libpygraphs.GraphTree_keys(self)
+
+    def values(self):
+        return _libpygraphs.GraphTree_values(self)
+
+    def items(self):
+        return _libpygraphs.GraphTree_items(self)
+
+    def __contains__(self, key):
+        return _libpygraphs.GraphTree___contains__(self, key)
+
+    def key_iterator(self):
+        return _libpygraphs.GraphTree_key_iterator(self)
+
+    def value_iterator(self):
+        return _libpygraphs.GraphTree_value_iterator(self)
+
+    def __setitem__(self, *args):
+        return _libpygraphs.GraphTree___setitem__(self, *args)
+
+    def asdict(self):
+        return _libpygraphs.GraphTree_asdict(self)
+
+    def __init__(self, *args):
+        _libpygraphs.GraphTree_swiginit(self, _libpygraphs.new_GraphTree(*args))
+
+    def empty(self):
+        return _libpygraphs.GraphTree_empty(self)
+
+    def size(self):
+        return _libpygraphs.GraphTree_size(self)
+
+    def swap(self, v):
+        return _libpygraphs.GraphTree_swap(self, v)
+
+    def begin(self):
+        return _libpygraphs.GraphTree_begin(self)
+
+    def end(self):
+        return _libpygraphs.GraphTree_end(self)
+
+    def clear(self):
+        return _libpygraphs.GraphTree_clear(self)
+
+    def get_allocator(self):
+        return _libpygraphs.GraphTree_get_allocator(self)
+
+    def count(self, x):
+        return _libpygraphs.GraphTree_count(self, x)
+
+    def erase(self, *args):
+        return _libpygraphs.GraphTree_erase(self, *args)
+
+    def find(self, x):
+        return _libpygraphs.GraphTree_find(self, x)
+    __swig_destroy__ = _libpygraphs.delete_GraphTree
+
+# Register GraphTree in _libpygraphs:
+_libpygraphs.GraphTree_swigregister(GraphTree)
+
+class SearchTree(object):
+    thisown = property(lambda x: x.this.own(), lambda x, v: x.this.own(v), doc="The membership flag")
+    __repr__ = _swig_repr
+    order = property(_libpygraphs.SearchTree_order_get, _libpygraphs.SearchTree_order_set)
+    distance = property(_libpygraphs.SearchTree_distance_get, _libpygraphs.SearchTree_distance_set)
+    antecessor = property(_libpygraphs.SearchTree_antecessor_get, _libpygraphs.SearchTree_antecessor_set)
+
+    def _columns(self):
+        return _libpygraphs.SearchTree__columns(self)
+
+    def __init__(self):
+        _libpygraphs.SearchTree_swiginit(self, _libpygraphs.new_SearchTree())
+    __swig_destroy__ = _libpygraphs.delete_SearchTree
+
+# Register SearchTree in _libpygraphs:
+_libpygraphs.SearchTree_swigregister(SearchTree)
+
+
+def bfs_tree(*args):
+    return _libpygraphs.bfs_tree(*args)
+
+def dijkstra_tree(*args):
+    return _libpygraphs.dijkstra_tree(*args)
 
 
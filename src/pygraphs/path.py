@@ -1,67 +1,84 @@
 # Copyright (c) 2019 Gabriel B. Sant'Anna <baiocchi.gabriel@gmail.com>
 # @License Apache <https://gitlab.com/baioc/pygraphs>
 
-from .libpygraphs import Graph, Digraph, PriorityQueue
-from .common import Node, graph_edges
-from typing import Union, Dict, Tuple, Sequence, Optional, Set
-from math import inf
+from .libpygraphs import Graph, Digraph, PriorityQueue, dijkstra_tree
+from .common import Node, CycleError
+from .frozen import FrozenGraph
+from typing import Union, Dict, Tuple, Sequence, Optional, Set, List, \
+    Iterable, Iterator, Generator, Mapping, Callable
+from math import inf, sqrt, radians, sin, cos, asin
+from heapq import heappush, heappop
+from array import array
+from collections import deque
+from multiprocessing import Pool
 from pprint import pprint
 
+try:
+    import numpy as np
+except ImportError:  # optional, only needed for dense matrices
+    np = None
 
-def shortest_routes(graph: Union[Graph, Digraph], start: Node) \
-        -> Dict[Node, Tuple[Sequence[Node], float]]:
+
+def shortest_routes(graph: Union[Graph, Digraph], start: Node,
+                    lazy: bool = False) \
+        -> Mapping[Node, Tuple[Sequence[Node], float]]:
     """
     Compute shortest routes from a single vertex to all others in a graph
-    using the Bellman-Ford algorithm.
+    using the Bellman-Ford algorithm, in its work queue variant (SPFA) which
+    only relaxes arcs leaving nodes whose distance has changed.
     Returns a dictionary containing nodes as keys that map to tuples with the
     shortest path found to them and the path's cost. Disconnected vertices are
-    mapped to (None, inf).
-    Raises a ValueError exception in case a negative cycle is found. O(V*E)
+    mapped to (None, inf). When lazy, returns a PathTree instead.
+    Raises a CycleError (a ValueError) as soon as a negative cycle is found,
+    with the cycle itself in its cycle attribute. O(V*E)
     """
 
-    # initialize
-    distances: Dict[Node, float] = {}
-    antecessors: Dict[Node, Optional[Node]] = {}
-    for v in graph.nodes():
-        distances[v] = inf if v != start else 0
-        antecessors[v] = None
+    snapshot = graph.freeze()
+    dist = [inf] * snapshot.node_number()
+    if start in snapshot.index:
+        dist[snapshot.index[start]] = 0
 
-    for _ in range(1, graph.node_number()):
-        done = True
-        for (u, v) in graph_edges(graph):
-            # relax
-            Duv = distances[u] + graph.weight(u, v)
-            if Duv < distances[v]:
-                distances[v] = Duv
-                antecessors[v] = u
-                done = False
-        if done:
-            break
-
-    # report negative cycle
-    for (u, v) in graph_edges(graph):
-        if distances[u] + graph.weight(u, v) < distances[v]:
-            raise ValueError("Negative cycle found near ({}, {})".format(u,v))
+    (pred, cycle) = _csr_spfa(snapshot.offsets, snapshot.targets,
+                              snapshot.weights, dist)
+    if cycle is not None:
+        cycle = [snapshot.labels[v] for v in cycle]
+        raise CycleError("Negative cycle found near ({}, {})"
+                         .format(cycle[0], cycle[1]), cycle)
 
-    return _pathmap(distances, antecessors)
+    tree = PathTree(snapshot.labels, dist, pred, snapshot.index)
+    return tree if lazy else dict(tree.items())
 
 
-def shortest_paths(graph: Union[Graph, Digraph], source: Node) \
-        -> Dict[Node, Tuple[Sequence[Node], float]]:
+def shortest_paths(graph: Union[Graph, Digraph], source: Node,
+                   lazy: bool = False) \
+        -> Mapping[Node, Tuple[Sequence[Node], float]]:
     """
     Use Dijkstra's Shortest Path First algorithm to find the shortest paths
     between a given origin and all other nodes in a graph.
     Does not guarantee a shortest path when presented with negative weights.
     Returns a dictionary containing nodes as keys that map to tuples with the
     shortest path found to them and the path's cost. Disconnected vertices are
-    mapped to (None, inf). O((V+E)*lg(V))
+    mapped to (None, inf). When lazy, returns a PathTree instead.
+    O((V+E)*lg(V))
     """
 
+    if isinstance(graph, FrozenGraph):
+        (dist, pred) = _csr_dijkstra(graph.offsets, graph.targets,
+                                     graph.weights, graph.index.get(source, -1))
+        tree = PathTree(graph.labels, dist, pred, graph.index)
+        return tree if lazy else dict(tree.items())
+    elif isinstance(graph, (Graph, Digraph)):
+        # the native search tree comes back as columns, in a single call
+        (labels, dist, pred) = dijkstra_tree(graph, source)._columns()
+        tree = PathTree(labels, memoryview(dist).cast('d'),
+                        memoryview(pred).cast('q'))
+        return tree if lazy else dict(tree.items())
+
     # initialize
     distances: Dict[Node, float] = {}
     antecessors: Dict[Node, Optional[Node]] = {}
     unclosed = PriorityQueue(graph.node_number())
-    for v in graph.nodes():
+    for v in graph.nodes_list():
         d = inf if v != source else 0
         distances[v] = d
         antecessors[v] = None
@@ -69,16 +86,243 @@ def shortest_paths(graph: Union[Graph, Digraph], source: Node) \
 
     while not unclosed.empty():
         u = unclosed.dequeue()
-        for v in graph.neighbours(u):
+        for (v, w) in graph.neighbours_list(u):
             if unclosed.contains(v):
                 # relax
-                Duv = distances[u] + graph.weight(u, v)
+                Duv = distances[u] + w
                 if Duv < distances[v]:
                     antecessors[v] = u
                     distances[v] = Duv
                     unclosed.update(v, Duv)
 
-    return _pathmap(distances, antecessors)
+    return _result(distances, antecessors, lazy)
+
+
+def shortest_path(graph: Union[Graph, Digraph], source: Node, target: Node,
+                  bidirectional: bool = False) \
+        -> Tuple[Optional[Sequence[Node]], float]:
+    """
+    Find the shortest path between two nodes with Dijkstra's algorithm,
+    stopping as soon as the target is settled. A bidirectional search also
+    explores backwards from the target, along in-neighbours, until both
+    frontiers meet; it needs an undirected or reverse indexed graph and falls
+    back to the one-sided search otherwise.
+    Returns a tuple with the path found and its cost, or (None, inf) when the
+    target is unreachable. O((V+E)*lg(V))
+    """
+
+    if not (graph.contains(source) and graph.contains(target)):
+        return (None, inf)
+    elif source == target:
+        return ([source], 0)
+    elif bidirectional and graph.reverse_indexed():
+        return _bidirectional_path(graph, source, target)
+
+    distances: Dict[Node, float] = {source: 0}
+    antecessors: Dict[Node, Optional[Node]] = {source: None}
+    closed: Set[Node] = set()
+    unclosed = PriorityQueue()
+    unclosed.enqueue(source, 0)
+
+    while not unclosed.empty():
+        u = unclosed.dequeue()
+        if u == target:
+            return (_trace(antecessors, target), distances[target])
+
+        closed.add(u)
+        for (v, w) in graph.neighbours_list(u):
+            if v not in closed:
+                # relax
+                Duv = distances[u] + w
+                if Duv < distances.get(v, inf):
+                    antecessors[v] = u
+                    distances[v] = Duv
+                    unclosed.enqueue(v, Duv)
+
+    return (None, inf)
+
+
+def _bidirectional_path(graph: Union[Graph, Digraph], source: Node,
+                        target: Node) -> Tuple[Optional[Sequence[Node]], float]:
+    # each side has its distances, antecessors, settled nodes and frontier,
+    # with the backward side walking arcs in reverse
+    forward = ({source: 0}, {source: None}, set(), PriorityQueue())
+    backward = ({target: 0}, {target: None}, set(), PriorityQueue())
+    forward[3].enqueue(source, 0)
+    backward[3].enqueue(target, 0)
+
+    best = inf
+    meeting: Optional[Node] = None
+
+    while not (forward[3].empty() or backward[3].empty()):
+        top_f = forward[3].priority(forward[3].front())
+        top_b = backward[3].priority(backward[3].front())
+        if top_f + top_b >= best:
+            break  # no shorter path can go through unsettled nodes
+
+        # expand the side with the closest frontier
+        if top_f <= top_b:
+            (side, other, adjacent) = \
+                (forward, backward, graph.neighbours_list)
+        else:
+            (side, other, adjacent) = \
+                (backward, forward, graph.predecessors_list)
+
+        (distances, antecessors, closed, unclosed) = side
+        u = unclosed.dequeue()
+        closed.add(u)
+
+        for (v, w) in adjacent(u):
+            if v in closed:
+                continue
+
+            Duv = distances[u] + w
+            if Duv < distances.get(v, inf):
+                antecessors[v] = u
+                distances[v] = Duv
+                unclosed.enqueue(v, Duv)
+
+            if v in other[0] and distances[v] + other[0][v] < best:
+                best = distances[v] + other[0][v]
+                meeting = v
+
+    if meeting is None:
+        return (None, inf)
+
+    path = _trace(forward[1], meeting)
+    tail = _trace(backward[1], meeting)
+    tail.reverse()
+    return (path + tail[1:], best)
+
+
+def _trace(antecessors: Dict[Node, Optional[Node]], node: Node) -> List[Node]:
+    path: List[Node] = []
+    while node is not None:
+        path.append(node)
+        node = antecessors[node]
+
+    path.reverse()
+    return path
+
+
+def astar(graph: Union[Graph, Digraph], source: Node, target: Node,
+          heuristic: Callable[[Node, Node], float]) \
+        -> Tuple[Optional[Sequence[Node]], float]:
+    """
+    Find the shortest path between two nodes with the A* search algorithm,
+    guided by an admissible heuristic(u, target) which never overestimates
+    the distance from node u to the target (e.g. euclidean, haversine and
+    landmarks, in this module). A zero heuristic makes it Dijkstra's.
+    Returns a tuple with the path found and its cost, or (None, inf) when the
+    target is unreachable. O((V+E)*lg(V))
+    """
+
+    if not (graph.contains(source) and graph.contains(target)):
+        return (None, inf)
+
+    distances: Dict[Node, float] = {source: 0}
+    antecessors: Dict[Node, Optional[Node]] = {source: None}
+    unclosed = PriorityQueue()
+    unclosed.enqueue(source, heuristic(source, target))
+
+    while not unclosed.empty():
+        u = unclosed.dequeue()
+        if u == target:
+            return (_trace(antecessors, target), distances[target])
+
+        for (v, w) in graph.neighbours_list(u):
+            Duv = distances[u] + w
+            if Duv < distances.get(v, inf):
+                antecessors[v] = u
+                distances[v] = Duv
+                unclosed.enqueue(v, Duv + heuristic(v, target))
+
+    return (None, inf)
+
+
+def euclidean(coordinates: Mapping[Node, Sequence[float]],
+              scale: float = 1.0) -> Callable[[Node, Node], float]:
+    """A* heuristic for nodes placed in an euclidean space, where weights are
+    at least as big as scale times the distance between their endpoints."""
+
+    def heuristic(u: Node, target: Node) -> float:
+        (p, q) = (coordinates[u], coordinates[target])
+        return scale * sqrt(sum((a - b)**2 for (a, b) in zip(p, q)))
+
+    return heuristic
+
+
+def haversine(coordinates: Mapping[Node, Tuple[float, float]],
+              radius: float = 6371.0) -> Callable[[Node, Node], float]:
+    """A* heuristic for nodes given by (latitude, longitude) in degrees, with
+    the great-circle distance over a sphere (by default, the Earth in km)."""
+
+    def heuristic(u: Node, target: Node) -> float:
+        (lat1, lon1) = map(radians, coordinates[u])
+        (lat2, lon2) = map(radians, coordinates[target])
+        h = sin((lat2 - lat1) / 2)**2 \
+            + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2)**2
+        return 2 * radius * asin(min(1.0, sqrt(h)))
+
+    return heuristic
+
+
+def landmarks(graph: Union[Graph, Digraph], marks: Union[int, Iterable[Node]]) \
+        -> Callable[[Node, Node], float]:
+    """
+    A* heuristic for the ALT method, which bounds distances with the triangle
+    inequality over precomputed distance tables from and to a few landmarks.
+    Landmarks can be given or, when marks is a number, picked far apart.
+    Requires non-negative weights. O(L * (V+E)*lg(V)) preprocessing
+    """
+
+    snapshot = graph.freeze()
+    reverse = snapshot.transposed()
+
+    def from_mark(g: FrozenGraph, mark: int) -> List[float]:
+        return _csr_dijkstra(g.offsets, g.targets, g.weights, mark)[0]
+
+    tables: List[Tuple[List[float], List[float]]] = []
+
+    if isinstance(marks, int):
+        # farthest-first selection, with distances to the chosen set
+        n = snapshot.node_number()
+        closest = [inf] * n
+        chosen: Set[int] = set()
+        mark = 0
+        for _ in range(min(marks, n)):
+            chosen.add(mark)
+            tables.append((from_mark(snapshot, mark), from_mark(reverse, mark)))
+            for v in range(n):
+                closest[v] = min(closest[v], tables[-1][0][v])
+            candidates = [v for v in range(n) if v not in chosen]
+            if not candidates:
+                break
+            unreached = [v for v in candidates if closest[v] == inf]
+            mark = unreached[0] if unreached \
+                else max(candidates, key=closest.__getitem__)
+    else:
+        for mark in marks:
+            m = snapshot.index[mark]
+            tables.append((from_mark(snapshot, m), from_mark(reverse, m)))
+
+    index = snapshot.index
+
+    def heuristic(u: Node, target: Node) -> float:
+        (i, j) = (index[u], index[target])
+        bound = 0
+        for (dist_from, dist_to) in tables:
+            # d(u,t) >= d(L,t) - d(L,u) and d(u,t) >= d(u,L) - d(t,L), where
+            # undefined differences (inf - inf) never compare greater
+            a = dist_from[j] - dist_from[i]
+            b = dist_to[i] - dist_to[j]
+            if a > bound:
+                bound = a
+            if b > bound:
+                bound = b
+        return bound
+
+    return heuristic
 
 
 def shortest_network(graph: Union[Graph, Digraph]) \
@@ -87,8 +331,17 @@ def shortest_network(graph: Union[Graph, Digraph]) \
     Returns a bidimensional dictionary D that uses node labels as indexes such
     that D[u][v] is the shortest circuit cost going from u to v. O(V^3)"""
 
-    vertices = graph.nodes()
-    dist = {u: {v: graph.weight(u, v) for v in vertices} for u in vertices}
+    if np is not None:
+        (labels, matrix) = distance_matrix(graph)
+        return {u: dict(zip(labels, row.tolist()))
+                for (u, row) in zip(labels, matrix)}
+
+    vertices = graph.nodes_list()
+    dist = {u: dict.fromkeys(vertices, inf) for u in vertices}
+    for u in vertices:
+        dist[u][u] = graph.weight(u, u)
+        for (v, w) in graph.neighbours_list(u):
+            dist[u][v] = w
 
     # for every vertex, check if it is a shortcut between two pairs
     for interm in vertices:
@@ -100,6 +353,349 @@ def shortest_network(graph: Union[Graph, Digraph]) \
     return dist
 
 
+def distance_matrix(graph: Union[Graph, Digraph, FrozenGraph],
+                    predecessors: bool = False, block: Optional[int] = None):
+    """
+    Vectorized Floyd-Warshall over a dense NumPy float64 matrix (requires
+    numpy). Returns a tuple (labels, D), where D[i, j] is the shortest circuit
+    cost going from node labels[i] to node labels[j]. When predecessors are
+    requested, also returns an integer matrix P where P[i, j] is the index of
+    the node preceding j in a shortest path from i, or -1 if there's none.
+    Each of the V relaxation rounds updates the matrix in blocks of rows, all
+    at once by default, which trades temporary memory for locality. O(V^3)
+    """
+
+    if np is None:
+        raise ImportError("distance_matrix requires numpy")
+
+    snapshot = graph.freeze()
+    n = snapshot.node_number()
+    offsets = np.frombuffer(snapshot.offsets, dtype=np.int64)
+    rows = np.repeat(np.arange(n), np.diff(offsets))
+    cols = np.frombuffer(snapshot.targets, dtype=np.int64)
+
+    dist = np.full((n, n), inf)
+    dist[rows, cols] = np.frombuffer(snapshot.weights, dtype=np.float64)
+    # diagonal follows Graph.weight, i.e. directed graphs look for circuits
+    np.fill_diagonal(dist, inf if snapshot.directed() else 0)
+
+    if predecessors:
+        pred = np.full((n, n), -1, dtype=np.int64)
+        pred[rows, cols] = rows
+
+    block = n if block is None else max(1, block)
+    for k in range(n):
+        for lo in range(0, n, block):
+            part = dist[lo:lo+block]
+            via = part[:, k, None] + dist[k]
+            if predecessors:
+                better = via < part
+                pred[lo:lo+block][better] = \
+                    np.broadcast_to(pred[k], via.shape)[better]
+            np.minimum(part, via, out=part)
+
+    if predecessors:
+        return (snapshot.labels, dist, pred)
+    else:
+        return (snapshot.labels, dist)
+
+
+class PathTree(Mapping):
+    """
+    Lightweight result of a single-source shortest path search, which only
+    keeps each node's distance and predecessor. Works as a read-only mapping
+    from nodes to (path, cost) tuples, with paths rebuilt only when accessed,
+    so that results for big graphs don't hold V paths in memory at once.
+    """
+
+    def __init__(self, labels: Sequence[Node], distances: Sequence[float],
+                 antecessors: Sequence[int],
+                 index: Optional[Dict[Node, int]] = None):
+        # antecessors hold node indexes, or -1 for roots and unreachables
+        self.labels = labels
+        self.index = {v: i for (i, v) in enumerate(labels)} \
+            if index is None else index
+        self._dist = distances
+        self._pred = antecessors
+
+    @classmethod
+    def from_maps(cls, distances: Dict[Node, float],
+                  antecessors: Dict[Node, Optional[Node]]) -> 'PathTree':
+        labels = list(distances)
+        index = {v: i for (i, v) in enumerate(labels)}
+        pred = [-1 if antecessors[v] is None else index[antecessors[v]]
+                for v in labels]
+        return cls(labels, list(distances.values()), pred, index)
+
+    def distance(self, node: Node) -> float:
+        """Shortest distance to the given node. O(1)"""
+        i = self.index.get(node)
+        return inf if i is None else self._dist[i]
+
+    def antecessor(self, node: Node) -> Optional[Node]:
+        i = self.index.get(node)
+        p = -1 if i is None else self._pred[i]
+        return None if p < 0 else self.labels[p]
+
+    def path(self, node: Node) -> Optional[List[Node]]:
+        """Shortest path to the given node, None if unreachable. O(V)"""
+        i = self.index.get(node)
+        if i is None or self._dist[i] == inf:
+            return None
+
+        path: List[Node] = []
+        while i >= 0:
+            path.append(self.labels[i])
+            i = self._pred[i]
+
+        path.reverse()
+        return path
+
+    def paths(self) -> Iterator[Tuple[Node, List[Node]]]:
+        """Iterates over the shortest path to each reachable node."""
+        for (i, v) in enumerate(self.labels):
+            if self._dist[i] < inf:
+                yield (v, self.path(v))
+
+    def __getitem__(self, node: Node) -> Tuple[Optional[List[Node]], float]:
+        if node not in self.index:
+            raise KeyError(node)
+        path = self.path(node)
+        return (path, self.distance(node)) if path is not None else (None, inf)
+
+    def __contains__(self, node) -> bool:
+        return node in self.index
+
+    def __iter__(self) -> Iterator[Node]:
+        return iter(self.labels)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+
+def shortest_paths_many(graph: Union[Graph, Digraph, FrozenGraph],
+                        sources: Iterable[Node], workers: Optional[int] = None,
+                        paths: bool = False) \
+        -> Generator[Tuple[Node, Dict[Node, object]], None, None]:
+    """
+    Run Dijkstra's algorithm from many sources in parallel, using a pool of
+    worker processes which share a single read-only snapshot of the graph.
+    Yields a tuple (source, result) for each source as soon as it is done,
+    in no particular order. Results map every node to its shortest distance
+    from the source or, when paths are requested, are PathTrees which build
+    each path on demand. By default, uses as many workers as CPUs.
+    O(S * (V+E)*lg(V) / workers)
+    """
+
+    snapshot = graph.freeze()
+    labels = snapshot.labels
+
+    for (source, dist, pred) in _searches(snapshot, sources, workers, paths):
+        if not paths:
+            yield (source, dict(zip(labels, dist)))
+        else:
+            yield (source, PathTree(labels, dist, pred, snapshot.index))
+
+
+def sparse_network(graph: Union[Graph, Digraph], workers: Optional[int] = 1,
+                   sink=None):
+    """
+    Find shortest paths for all vertex pairs in a sparse graph through
+    Johnson's algorithm, which reweights arcs once with Bellman-Ford so that
+    it can then run Dijkstra from every node (with workers as in
+    shortest_paths_many, by default in this process alone).
+    Returns a bidimensional dictionary D that uses node labels as indexes such
+    that D[u][v] is the shortest circuit cost going from u to v, so that (as
+    in shortest_network) D[u][u] is the cheapest circuit through u on directed
+    graphs and 0 on undirected ones. Alternatively,
+    each row can be streamed to a sink, in which case only the sequence of
+    node labels is returned, giving the order of columns in each row: sink
+    may be called as sink(u, row) or be a writable V x V array (such as a
+    numpy.memmap) whose i-th row takes distances from the i-th node.
+    Raises a CycleError in case a negative cycle is found. O(V*E*lg(V))
+    """
+
+    snapshot = graph.freeze()
+    (labels, index) = (snapshot.labels, snapshot.index)
+    (offsets, targets) = (snapshot.offsets, snapshot.targets)
+
+    # potentials are distances from a virtual source linked to every node
+    height = [0.0] * snapshot.node_number()
+    (_, cycle) = _csr_spfa(offsets, targets, snapshot.weights, height)
+    if cycle is not None:
+        cycle = [labels[v] for v in cycle]
+        raise CycleError("Negative cycle found near ({}, {})"
+                         .format(cycle[0], cycle[1]), cycle)
+
+    # reduced costs are non-negative (up to rounding errors)
+    weights = array('d', snapshot.weights)
+    for u in range(snapshot.node_number()):
+        for a in range(offsets[u], offsets[u+1]):
+            weights[a] = max(0.0, weights[a] + height[u] - height[targets[a]])
+    reweighted = FrozenGraph(snapshot.directed(), snapshot.edge_number(),
+                             labels, offsets, targets, weights)
+
+    # on digraphs, the diagonal closes circuits through each node's in-arcs
+    incoming = snapshot.transposed() if snapshot.directed() else None
+
+    network: Dict[Node, Dict[Node, float]] = {}
+    for (source, dist, _) in _searches(reweighted, labels, workers, False):
+        u = index[source]
+        hu = height[u]
+        row = [d - hu + hv for (d, hv) in zip(dist, height)]
+        if incoming is not None:
+            row[u] = min((row[incoming.targets[a]] + incoming.weights[a]
+                          for a in incoming.arcs(u)), default=inf)
+        if sink is None:
+            network[source] = dict(zip(labels, row))
+        elif callable(sink):
+            sink(source, row)
+        else:
+            sink[index[source]] = row
+
+    return network if sink is None else labels
+
+
+def _searches(snapshot: FrozenGraph, sources: Iterable[Node],
+              workers: Optional[int], paths: bool) \
+        -> Iterator[Tuple[Node, array, Optional[array]]]:
+    if workers == 1:
+        for source in sources:
+            yield _search(snapshot, source, paths)
+        return
+
+    # workers receive the snapshot once, at startup (or by forking)
+    with Pool(workers, _pool_init, (snapshot,)) as pool:
+        tasks = ((source, paths) for source in sources)
+        yield from pool.imap_unordered(_pool_search, tasks, chunksize=4)
+
+
+_pool_graph: Optional[FrozenGraph] = None
+
+
+def _pool_init(graph: FrozenGraph):
+    global _pool_graph
+    _pool_graph = graph
+
+
+def _pool_search(task: Tuple[Node, bool]) \
+        -> Tuple[Node, array, Optional[array]]:
+    (source, paths) = task
+    return _search(_pool_graph, source, paths)
+
+
+def _search(g: FrozenGraph, source: Node, paths: bool) \
+        -> Tuple[Node, array, Optional[array]]:
+    # results are kept as compact arrays, which are also cheaper to send
+    (dist, pred) = _csr_dijkstra(g.offsets, g.targets, g.weights,
+                                 g.index.get(source, -1))
+    return (source, array('d', dist), array('q', pred) if paths else None)
+
+
+def _csr_dijkstra(offsets: Sequence[int], targets: Sequence[int],
+                  weights: Sequence[float], source: int) \
+        -> Tuple[List[float], List[int]]:
+    # Dijkstra over integer ids of a CSR adjacency, with a lazy-deletion heap;
+    # returns distances and predecessors (-1 for the source and unreachables)
+    n = len(offsets) - 1
+    dist = [inf] * n
+    pred = [-1] * n
+    closed = [False] * n
+
+    heap: List[Tuple[float, int]] = []
+    if 0 <= source < n:
+        dist[source] = 0
+        heap.append((0, source))
+
+    while heap:
+        (d, u) = heappop(heap)
+        if closed[u]:
+            continue
+        closed[u] = True
+
+        for a in range(offsets[u], offsets[u+1]):
+            v = targets[a]
+            if closed[v]:
+                continue
+            Duv = d + weights[a]
+            if Duv < dist[v]:
+                dist[v] = Duv
+                pred[v] = u
+                heappush(heap, (Duv, v))
+
+    return (dist, pred)
+
+
+def _csr_spfa(offsets: Sequence[int], targets: Sequence[int],
+              weights: Sequence[float], dist: List[float]) \
+        -> Tuple[List[int], Optional[List[int]]]:
+    # queue-based Bellman-Ford over integer ids of a CSR adjacency, starting
+    # from every node with a finite (initial) distance, updated in place;
+    # returns predecessors and, if one is found, a negative cycle
+    n = len(dist)
+    pred = [-1] * n
+    queued = [d < inf for d in dist]
+    queue = deque(v for v in range(n) if queued[v])
+
+    relaxations = 0
+    while queue:
+        u = queue.popleft()
+        queued[u] = False
+        du = dist[u]
+
+        for a in range(offsets[u], offsets[u+1]):
+            v = targets[a]
+            Duv = du + weights[a]
+            if Duv < dist[v]:
+                dist[v] = Duv
+                pred[v] = u
+                if not queued[v]:
+                    queued[v] = True
+                    queue.append(v)
+
+                # amortized walk-to-root: any cycle in the predecessor graph
+                # is negative, and one must show up if such cycle is reachable
+                relaxations += 1
+                if relaxations >= n:
+                    relaxations = 0
+                    cycle = _predecessor_cycle(pred)
+                    if cycle is not None:
+                        return (pred, cycle)
+
+    return (pred, None)
+
+
+def _predecessor_cycle(pred: Sequence[int]) -> Optional[List[int]]:
+    # walks every predecessor chain once, marking nodes by walk
+    walk = [-1] * len(pred)
+    for root in range(len(pred)):
+        v = root
+        while v >= 0 and walk[v] < 0:
+            walk[v] = root
+            v = pred[v]
+
+        if v >= 0 and walk[v] == root:  # came back to the current walk
+            cycle = [v]
+            u = pred[v]
+            while u != v:
+                cycle.append(u)
+                u = pred[u]
+            cycle.append(v)
+            cycle.reverse()
+            return cycle
+
+    return None
+
+
+def _result(distances: Dict[Node, float],
+            antecessors: Dict[Node, Optional[Node]], lazy: bool) \
+        -> Mapping[Node, Tuple[Sequence[Node], float]]:
+    if lazy:
+        return PathTree.from_maps(distances, antecessors)
+    else:
+        return _pathmap(distances, antecessors)
+
+
 def _pathmap(distances: Dict[Node, float],
              antecessors: Dict[Node, Optional[Node]]) \
         -> Dict[Node, Tuple[Sequence[Node], float]]:
@@ -134,3 +730,180 @@ def _test_path():
 
     N = shortest_paths(G, 'S')
     pprint(N)
+
+
+def _test_landmarks():
+    # distinct landmarks, no more than nodes, and bounds never overshoot
+    from inspect import getclosurevars
+    G = Digraph()
+    G.link_many(['a', 'b', 'c', 'd'], ['b', 'c', 'a', 'e'], [1, 2, 3, 4])
+    H = Graph()
+    H.link('x', 'y', 2)
+    H.insert('z')
+    # zero weight arcs tie the farthest candidates with chosen landmarks
+    (Z, W) = (Digraph(), Digraph())
+    Z.link_many(['p', 'q'], ['q', 'p'], [0, 1])
+    W.link_many(['p', 'q'], ['q', 'p'], [1, 0])
+
+    for (graph, marks) in ((G, 10), (G, 2), (H, 5), (Z, 2), (W, 2)):
+        h = landmarks(graph, marks)
+        tables = getclosurevars(h).nonlocals['tables']
+        assert len(tables) == min(marks, graph.node_number())
+        assert len({tuple(forward) for (forward, _) in tables}) == len(tables)
+        for u in graph.nodes():
+            for (v, (_, cost)) in shortest_paths(graph, u).items():
+                assert h(u, v) <= cost, (u, v)
+    assert landmarks(G, 10)('a', 'c') == 3 and landmarks(H, 5)('x', 'y') == 2
+    print("landmarks ok")
+
+
+def _test_network():
+    # both all-pairs methods must agree, diagonals included
+    E: Set[Tuple[Node, Node, float]] = {('a', 'b', 4), ('b', 'c', -2),
+                                        ('c', 'a', 3), ('c', 'd', 1),
+                                        ('d', 'b', 2), ('a', 'd', 7)}
+    for G in (Graph(), Digraph()):
+        for (u, v, w) in E:
+            G.link(u, v, abs(w) if not G.directed() else w)
+
+        dense = shortest_network(G)
+        sparse = sparse_network(G)
+        print(G.directed(), all(sparse[u][v] == dense[u][v]
+                                for u in dense for v in dense[u]))
+
+
+def _test_many():
+    # batched searches agree with single ones, in this process or a pool
+    from random import Random
+    rng = Random(7)
+    G = Digraph()
+    for _ in range(120):
+        G.link(str(rng.randrange(30)), str(rng.randrange(30)), rng.randint(1, 9))
+    G.insert('lone')
+
+    expected = {u: shortest_paths(G, u) for u in G.nodes()}
+    for workers in (1, 2):
+        found = dict(shortest_paths_many(G, G.nodes(), workers))
+        assert found.keys() == expected.keys()
+        for (u, dist) in found.items():
+            assert dist == {v: cost for (v, (_, cost)) in expected[u].items()}
+
+        # ties may be broken differently, but paths must cost the same
+        for (u, tree) in shortest_paths_many(G, expected, workers, True):
+            for (v, (path, cost)) in tree.items():
+                assert cost == expected[u][v][1]
+                if path is not None:
+                    assert cost == sum(G.weight(a, b)
+                                       for (a, b) in zip(path, path[1:]))
+    print("shortest_paths_many ok")
+
+
+def _test_matrix():
+    # vectorized Floyd-Warshall agrees with the plain triple loop
+    if np is None:
+        print("distance_matrix skipped, numpy is missing")
+        return
+
+    from random import Random
+    rng = Random(8)
+    height = [rng.randint(0, 6) for _ in range(20)]
+    for G in (Graph(), Digraph()):
+        for _ in range(60):
+            (u, v) = (rng.randrange(20), rng.randrange(20))
+            # potentials make negative arcs, yet never negative cycles
+            w = rng.randint(0, 9)
+            w += height[u] - height[v] if G.directed() else 0
+            G.link(str(u), str(v), w)
+        G.insert('lone')
+
+        vertices = G.nodes_list()
+        dist = {u: dict.fromkeys(vertices, inf) for u in vertices}
+        for u in vertices:
+            dist[u].update(G.neighbours_list(u))
+            dist[u][u] = G.weight(u, u)  # the diagonal, as in D
+        for k in vertices:
+            for u in vertices:
+                for v in vertices:
+                    dist[u][v] = min(dist[u][v], dist[u][k] + dist[k][v])
+
+        for block in (None, 1, 7):
+            (labels, D, P) = distance_matrix(G, True, block)
+            for (i, u) in enumerate(labels):
+                for (j, v) in enumerate(labels):
+                    assert D[i, j] == dist[u][v], (u, v)
+                    k = P[i, j]
+                    if D[i, j] == inf or (i == j and not G.directed()):
+                        assert k == -1, (u, v)
+                    else:  # preceded by the last arc of a shortest path
+                        before = D[i, k] if k != i else 0
+                        assert before + G.weight(labels[k], v) == D[i, j]
+    print("distance_matrix ok")
+
+
+def _test_tree():
+    # lazy trees hold the same answers as eager maps
+    E = [('S', 'A', 5), ('S', 'B', 3), ('B', 'A', 1), ('A', 'C', 6),
+         ('B', 'C', 4)]
+    for G in (Graph(), Digraph()):
+        for (u, v, w) in E:
+            G.link(u, v, w)
+        G.insert('X')
+
+        for graph in (G, G.freeze()):
+            for search in (shortest_paths, shortest_routes):
+                tree = search(graph, 'S', lazy=True)
+                assert isinstance(tree, PathTree)
+                assert dict(tree.items()) == search(graph, 'S')
+                assert tree['C'] == (['S', 'B', 'C'], 7)
+                assert tree['X'] == (None, inf) and tree.path('X') is None
+                assert tree.antecessor('A') == 'B'
+                assert tree.antecessor('S') is None
+                assert len(tree) == 5 and 'X' in tree and 'Y' not in tree
+                assert dict(tree.paths())['A'] == ['S', 'B', 'A']
+                try:
+                    tree['Y']
+                except KeyError:
+                    pass
+                else:
+                    assert False, "missing node found in tree"
+
+    tree = PathTree.from_maps({'a': 0, 'b': 2, 'c': inf},
+                              {'a': None, 'b': 'a', 'c': None})
+    assert dict(tree.items()) == _pathmap({'a': 0, 'b': 2, 'c': inf},
+                                          {'a': None, 'b': 'a', 'c': None})
+    print("PathTree ok")
+
+
+def _test_routes():
+    # SPFA handles negative arcs, and reports negative cycles it can reach
+    D = Digraph()
+    D.link_many(['s', 's', 'a', 'b', 'c'], ['a', 'b', 'c', 'a', 'd'],
+                [4, 2, 3, -3, -1])
+    routes = shortest_routes(D, 's')
+    assert routes['a'] == (['s', 'b', 'a'], -1)
+    assert routes['d'] == (['s', 'b', 'a', 'c', 'd'], 1)
+
+    # without negative arcs, it agrees with Dijkstra
+    from random import Random
+    rng = Random(12)
+    for G in (Graph(), Digraph()):
+        for _ in range(200):
+            G.link(str(rng.randrange(50)), str(rng.randrange(50)),
+                   rng.randint(0, 9))
+        for u in ('0', '1', '2'):
+            dijkstra = shortest_paths(G, u)
+            for (v, (_, cost)) in shortest_routes(G, u).items():
+                assert cost == dijkstra[v][1], (u, v)
+
+    D.link('d', 'b', -1)
+    D.insert('x')
+    try:
+        shortest_routes(D, 's')
+    except CycleError as error:
+        cycle = error.cycle
+        assert cycle[0] == cycle[-1] and len(cycle) == 5
+        assert sum(D.weight(u, v) for (u, v) in zip(cycle, cycle[1:])) < 0
+    else:
+        assert False, "negative cycle not found"
+    assert shortest_routes(D, 'x')['s'] == (None, inf)  # out of its reach
+    print("shortest_routes ok")
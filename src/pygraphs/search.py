@@ -1,8 +1,9 @@
 # Copyright (c) 2019 Gabriel B. Sant'Anna <baiocchi.gabriel@gmail.com>
 # @License Apache <https://gitlab.com/baioc/pygraphs>
 
-from .libpygraphs import Graph, Digraph
+from .libpygraphs import Graph, Digraph, bfs_tree
 from .common import Node
+from .frozen import FrozenGraph
 from typing import Union, Generator, Tuple, Set, List
 from collections import deque
 
@@ -13,6 +14,18 @@ def breadth_first(graph: Union[Graph, Digraph], root: Node) \
     Yields a tuple containing each visited node (except starting one), together
     with the depth level it was found and its search tree antecessor. O(V+E)"""
 
+    if isinstance(graph, FrozenGraph):
+        yield from _frozen_first(graph, root, breadth=True)
+        return
+    elif isinstance(graph, (Graph, Digraph)):
+        # the whole search runs natively, then its tree is replayed in order
+        (labels, depths, antecessors) = bfs_tree(graph, root)._columns()
+        depths = memoryview(depths).cast('d')
+        antecessors = memoryview(antecessors).cast('q')
+        for i in range(1, len(labels)):
+            yield (labels[i], int(depths[i]), labels[antecessors[i]])
+        return
+
     visited: Set[Node] = {root}
     queue = deque()
     queue.append((root, 0))
@@ -32,21 +45,65 @@ def depth_first(graph: Union[Graph, Digraph], root: Node) \
     Yields a tuple containing each visited node (except starting one), together
     with the depth level it was found and its search tree antecessor. O(V+E)"""
 
+    if isinstance(graph, FrozenGraph):
+        yield from _frozen_first(graph, root, breadth=False)
+        return
+
     visited: Set[Node] = {root}
     stack: List[Tuple[Node, int, Node]] = []
-    for v in graph.neighbours(root):
+    for (v, _) in graph.neighbours_list(root):
         visited.add(v)
         stack.append((v, 1, root))
 
     while stack:
         (u, depth, antecessor) = stack.pop()
         yield (u, depth, antecessor)
-        for v in graph.neighbours(u):
+        for (v, _) in graph.neighbours_list(u):
             if v not in visited:
                 visited.add(v)
                 stack.append((v, depth + 1, u))
 
 
+def _frozen_first(graph: FrozenGraph, root: Node, breadth: bool) \
+        -> Generator[Tuple[Node, int, Node], None, None]:
+    # same traversals as above, but over the snapshot's integer ids
+    if root not in graph.index:
+        return
+
+    labels, offsets, targets = graph.labels, graph.offsets, graph.targets
+    visited = [False] * len(labels)
+    r = graph.index[root]
+    visited[r] = True
+
+    if breadth:
+        queue = deque()
+        queue.append((r, 0))
+        while queue:
+            (u, depth) = queue.popleft()
+            for a in range(offsets[u], offsets[u+1]):
+                v = targets[a]
+                if not visited[v]:
+                    yield (labels[v], depth + 1, labels[u])
+                    visited[v] = True
+                    queue.append((v, depth + 1))
+
+    else:
+        stack: List[Tuple[int, int, int]] = []
+        for a in range(offsets[r], offsets[r+1]):
+            v = targets[a]
+            visited[v] = True
+            stack.append((v, 1, r))
+
+        while stack:
+            (u, depth, antecessor) = stack.pop()
+            yield (labels[u], depth, labels[antecessor])
+            for a in range(offsets[u], offsets[u+1]):
+                v = targets[a]
+                if not visited[v]:
+                    visited[v] = True
+                    stack.append((v, depth + 1, u))
+
+
 def _test_search():
     V: Set[Node] = {'1', '2', '3', '4', '5', '6', '7', '8'}
     E: Set[Tuple[Node, Node]] = {('8', '3'), ('8', '4'),
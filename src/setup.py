@@ -17,6 +17,7 @@ setuptools.setup(
     package_dir={'pygraphs': 'pygraphs/'},
     # py_modules=['pygraphs.libpygraphs'],
     package_data={'pygraphs': ['_libpygraphs.so']},
+    extras_require={'numpy': ['numpy']},
     classifiers=[
         'Operating System :: POSIX :: Linux',
         'License :: OSI Approved :: Apache Software License',